@@ -0,0 +1,151 @@
+"""
+    Resolution of acronyms in extracted requirements statements.
+
+    An acronym file has one acronym per line: "ACRONYM,Full text". The acronyms of a file are
+    compiled once into a single regular expression (built from a trie of all acronyms, so it
+    stays fast for dictionaries with thousands of entries). Every requirement is rewritten in
+    one pass:
+        - only whole words are replaced ("CAN" is not replaced inside "CANCEL")
+        - the longest acronym wins ("CIL" before "CI")
+        - plurals are resolved as well ("OBCs"), unless the plural is listed itself
+        - expansions are never substituted again by other acronyms
+
+    Compiled matchers are cached by the content hash of the acronym file.
+
+"""
+
+import re
+
+from lib.page_cache import hashFile
+
+_matchers = {}
+
+#___________________________________________________________________________________________________
+def loadAcronyms(path_to_acronyms):
+    """
+        Loads an acronym file and returns a dictionary acronym -> full text.
+        Blank lines are ignored. If an acronym is listed twice, the first entry is used.
+    """
+
+    acronym_dict = {}
+
+    with open(path_to_acronyms, "r") as f:
+        for line in f:
+            if "," not in line:
+                continue
+
+            acronym, full_text = line.rstrip("\r\n").split(",", 1)
+            acronym = acronym.strip()
+
+            if acronym != "" and acronym not in acronym_dict:
+                acronym_dict[acronym] = full_text
+
+    return acronym_dict
+
+#___________________________________________________________________________________________________
+def getTriePattern(words):
+    """
+        Builds a regular expression matching exactly the given words.
+        Common prefixes are shared, e.g. ["CI", "CIL", "CIs"] -> "CI(?:[Ls])?".
+    """
+
+    trie = {}
+    for word in words:
+        node = trie
+        for c in word:
+            node = node.setdefault(c, {})
+        node[""] = {}
+
+    def toPattern(node):
+
+        if len(node) == 1 and "" in node:
+            return ""
+
+        optional = "" in node
+        branches = [re.escape(c) + toPattern(node[c]) for c in sorted(node) if c != ""]
+
+        if all(len(b) == 1 for b in branches) and len(branches) > 1:
+            pattern = "[" + "".join(branches) + "]"
+        elif len(branches) == 1:
+            pattern = branches[0]
+        else:
+            pattern = "(?:" + "|".join(branches) + ")"
+
+        if optional:
+            if len(branches) == 1 and len(branches[0]) > 1 and not pattern.startswith("["):
+                pattern = "(?:" + pattern + ")"
+            pattern += "?"
+
+        return pattern
+
+    return toPattern(trie)
+
+#___________________________________________________________________________________________________
+class Matcher:
+    """
+        Compiled acronym dictionary, called as function text -> resolved text.
+        Counts the substitutions made over its lifetime.
+    """
+
+    def __init__(self, acronym_dict):
+
+        self.substitutions = 0
+        self.regex = None
+
+        if len(acronym_dict) > 0:
+            self.regex = re.compile(r"(?<!\w)(" + getTriePattern(acronym_dict.keys()) + r")(s?)(?!\w)")
+            lookup = acronym_dict.__getitem__
+            self.replace = lambda match: lookup(match.group(1)) + match.group(2)
+
+    def __call__(self, text):
+
+        if self.regex is None:
+            return text
+
+        text, count = self.regex.subn(self.replace, text)
+        self.substitutions += count
+
+        return text
+
+#___________________________________________________________________________________________________
+def compileMatcher(acronym_dict):
+    """
+        Compiles a dictionary acronym -> full text into a function text -> resolved text.
+    """
+
+    return Matcher(acronym_dict)
+
+#___________________________________________________________________________________________________
+def getMatcher(path_to_acronyms):
+    """
+        Returns the compiled matcher of an acronym file. Every file content is compiled once.
+    """
+
+    file_hash = hashFile(path_to_acronyms)
+    matcher = _matchers.get(file_hash)
+
+    if matcher is None:
+        matcher = compileMatcher(loadAcronyms(path_to_acronyms))
+        _matchers[file_hash] = matcher
+
+    return matcher
+
+#___________________________________________________________________________________________________
+def resolveAcronyms(req_list, path_to_acronyms):
+    """
+        Load acronyms for specific requirement document from given path.
+        Replace every abbrevation with the full text in the requirements list.
+
+        Note: if an acronym is not listed in the abbrevation list of the requirements document,
+        than the acronym is not resolved (e.g. RAM).
+    """
+
+    if path_to_acronyms == "":
+        return req_list
+
+    matcher = getMatcher(path_to_acronyms)
+
+    for i, req in enumerate(req_list):
+        req_list[i] = matcher(req)
+
+    return req_list
@@ -0,0 +1,342 @@
+"""
+    Text backends of the text stage (see pdf_text.py).
+
+    A backend converts the pages of a PDF to text. All backends have the same interface:
+        isAvailable()       True if the backend can be used (its package is installed)
+        getVersion()        name and version, part of the page cache key
+        open(path)          returns the number of pages and a function page index -> text
+        cacheable           False if the pages should not be stored in the page cache
+
+    BACKENDS:
+    "pypdf2"        PyPDF2 (default, see requirements.txt)
+    "pypdf"         pypdf, the successor of PyPDF2
+    "pymupdf"       PyMuPDF (fitz)
+    "pdfminer"      pdfminer.six
+    "textdump"      pre-extracted text next to the PDF: <name>.txt or <name>.txt.gz with the
+                    pages separated by form feeds (as written by pdftotext or "backends dump")
+
+    The PDF packages are imported only when a document is opened. Different backends do not
+    produce the same text, so the profiles of the extractors are written for PyPDF2; use the
+    benchmark to check the equivalence of another backend before switching.
+
+"""
+
+import gzip
+import importlib.util
+import io
+import os
+import time
+
+#___________________________________________________________________________________________________
+def getPackageVersion(package):
+
+    # importlib.metadata is slow to import and only needed for the page cache key
+    from importlib import metadata
+
+    return metadata.version(package)
+
+#___________________________________________________________________________________________________
+class PyPDF2Backend:
+
+    name = "pypdf2"
+    package = "PyPDF2"
+    cacheable = True
+
+    def isAvailable(self):
+
+        return importlib.util.find_spec(self.package) is not None
+
+    def getVersion(self):
+
+        return self.package + " " + getPackageVersion(self.package)
+
+    def open(self, path_to_doc):
+
+        from PyPDF2 import PdfReader
+
+        reader = PdfReader(path_to_doc)
+
+        return len(reader.pages), lambda i: reader.pages[i].extract_text()
+
+#___________________________________________________________________________________________________
+class PyPDFBackend(PyPDF2Backend):
+
+    name = "pypdf"
+    package = "pypdf"
+
+    def open(self, path_to_doc):
+
+        from pypdf import PdfReader
+
+        reader = PdfReader(path_to_doc)
+
+        return len(reader.pages), lambda i: reader.pages[i].extract_text()
+
+#___________________________________________________________________________________________________
+class PyMuPDFBackend(PyPDF2Backend):
+
+    name = "pymupdf"
+    package = "fitz"
+
+    def getVersion(self):
+
+        return "PyMuPDF " + getPackageVersion("PyMuPDF")
+
+    def open(self, path_to_doc):
+
+        import fitz
+
+        document = fitz.open(path_to_doc)
+
+        return document.page_count, lambda i: document.load_page(i).get_text()
+
+#___________________________________________________________________________________________________
+class PdfMinerBackend(PyPDF2Backend):
+
+    name = "pdfminer"
+    package = "pdfminer"
+
+    def getVersion(self):
+
+        return "pdfminer.six " + getPackageVersion("pdfminer.six")
+
+    def open(self, path_to_doc):
+        """
+            Parses the document once and renders a page on request, with the converter and
+            layout parameters of pdfminer.high_level.extract_text (page text and form feed).
+        """
+
+        from pdfminer.converter import TextConverter
+        from pdfminer.layout import LAParams
+        from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+        from pdfminer.pdfpage import PDFPage
+
+        # the pages read their content from the file while they are rendered
+        with open(path_to_doc, "rb") as f:
+            data = io.BytesIO(f.read())
+
+        pages = list(PDFPage.get_pages(data))
+        output = io.StringIO()
+        resources = PDFResourceManager(caching=True)
+        interpreter = PDFPageInterpreter(resources, TextConverter(resources, output, laparams=LAParams()))
+
+        def getText(i):
+            output.seek(0)
+            output.truncate()
+            interpreter.process_page(pages[i])
+            return output.getvalue()
+
+        return len(pages), getText
+
+#___________________________________________________________________________________________________
+class TextDumpBackend:
+
+    name = "textdump"
+    cacheable = False
+
+    def isAvailable(self):
+
+        return True
+
+    def getVersion(self):
+
+        return "textdump 1"
+
+    def getDumpPath(self, path_to_doc):
+        """
+            Returns the path of the text dump of a PDF or None if there is no dump.
+        """
+
+        base = os.path.splitext(path_to_doc)[0]
+
+        for path in (base + ".txt", base + ".txt.gz"):
+            if os.path.isfile(path):
+                return path
+
+        return None
+
+    def open(self, path_to_doc):
+
+        path = self.getDumpPath(path_to_doc)
+        if path is None:
+            raise FileNotFoundError("No text dump (.txt or .txt.gz) for " + path_to_doc)
+
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rt", encoding="utf-8", newline="") as f:
+            pages = f.read().split("\f")
+
+        # pdftotext ends the last page with a form feed as well
+        if len(pages) > 1 and pages[-1] == "":
+            pages.pop()
+
+        return len(pages), pages.__getitem__
+
+BACKENDS = {backend.name: backend for backend in
+            (PyPDF2Backend(), PyPDFBackend(), PyMuPDFBackend(), PdfMinerBackend(), TextDumpBackend())}
+
+#___________________________________________________________________________________________________
+def getBackend(name):
+    """
+        Returns the backend of the given name.
+    """
+
+    backend = BACKENDS.get(name)
+
+    if backend is None:
+        raise ValueError("Unknown text backend " + repr(name) + ", choose one of: " + ", ".join(BACKENDS))
+    if not backend.isAvailable():
+        raise ValueError("Text backend " + repr(name) + " is not installed")
+
+    return backend
+
+#___________________________________________________________________________________________________
+def getAvailableBackends():
+
+    return [name for name, backend in BACKENDS.items() if backend.isAvailable()]
+
+#___________________________________________________________________________________________________
+def writeDump(path_to_doc, pages, compress=True):
+    """
+        Writes the pages of a PDF as text dump for the textdump backend.
+        Returns the path of the dump.
+    """
+
+    path = os.path.splitext(path_to_doc)[0] + (".txt.gz" if compress else ".txt")
+    opener = gzip.open if compress else open
+
+    with opener(path, "wt", encoding="utf-8", newline="") as f:
+        f.write("\f".join(pages) + "\f")
+
+    return path
+
+#___________________________________________________________________________________________________
+def benchmarkBackends(jobs, names, reference="pypdf2", repeat=1, report=None):
+    """
+        Decodes every document with every backend (without page cache) and compares the pages
+        and the extracted requirements with the reference backend.
+
+        Returns one dictionary per (backend, document) with the pages per second, the number
+        of pages and requirements equal to the reference and the totals.
+    """
+
+    from lib import engine, registry
+
+    results = []
+    expected = {}
+
+    for name in [reference] + [n for n in names if n != reference]:
+        backend = getBackend(name)
+
+        for job in jobs:
+            pipeline = engine.compileProfile(registry.loadExtractor(job["extractor"]).PROFILE)
+            seconds = []
+
+            try:
+                for _ in range(0, repeat):
+                    start = time.perf_counter()
+                    page_count, getText = backend.open(job["pdf"])
+                    pages = [getText(i) for i in range(0, page_count)]
+                    seconds.append(time.perf_counter() - start)
+            except Exception as e:
+                result = {"backend": name, "document": job["key"], "error": str(e)}
+                results.append(result)
+                if report is not None:
+                    report(result)
+                continue
+
+            reqs = pipeline.runPages(pages)
+            if name == reference:
+                expected[job["key"]] = (pages, reqs)
+            reference_pages, reference_reqs = expected.get(job["key"], ([], []))
+
+            result = {
+                "backend": name,
+                "document": job["key"],
+                "seconds": min(seconds),
+                "pages_per_second": page_count / min(seconds) if min(seconds) > 0 else float("inf"),
+                "pages": page_count,
+                "equal_pages": sum(1 for a, b in zip(pages, reference_pages) if a == b),
+                "requirements": len(reqs),
+                "equal_requirements": len(set(reqs) & set(reference_reqs)),
+                "identical": reqs == reference_reqs,
+            }
+            results.append(result)
+            if report is not None:
+                report(result)
+
+    return results
+
+#___________________________________________________________________________________________________
+def printBenchmark(result):
+
+    if "error" in result:
+        print("%-9s %-24s failed: %s" % (result["backend"], result["document"], result["error"]))
+        return
+
+    print("%-9s %-24s %8.1f pages/s  pages %3d/%3d equal  requirements %4d/%4d equal%s" % (
+        result["backend"], result["document"], result["pages_per_second"], result["equal_pages"],
+        result["pages"], result["equal_requirements"], result["requirements"],
+        "  (identical)" if result["identical"] else ""))
+
+#___________________________________________________________________________________________________
+def main(argv):
+    """
+        Command line of the backends, see main.py.
+    """
+
+    import argparse
+    import json
+
+    from lib import batch, pdf_text
+
+    parser = argparse.ArgumentParser(prog="main.py backends", description="List, compare and dump text backends.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("list", help="list the text backends")
+
+    bench = commands.add_parser("bench", help="compare throughput and output of the backends")
+    bench.add_argument("documents", nargs="*", help="document keys (default: all)")
+    bench.add_argument("--input-dir", default="input", help="folder with the PDFs (default: input)")
+    bench.add_argument("--backends", default=None, help="comma separated backends (default: all available)")
+    bench.add_argument("--repeat", type=int, default=1, help="timed runs per document (default: 1)")
+    bench.add_argument("--output", default=None, help="save the results as JSON")
+
+    dump = commands.add_parser("dump", help="write text dumps of the PDFs for the textdump backend")
+    dump.add_argument("documents", nargs="*", help="document keys (default: all)")
+    dump.add_argument("--input-dir", default="input", help="folder with the PDFs (default: input)")
+    dump.add_argument("--plain", action="store_true", help="write .txt instead of .txt.gz")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "bench" and args.repeat < 1:
+        bench.error("--repeat must be at least 1")
+
+    if args.command == "list":
+        for name, backend in BACKENDS.items():
+            print("%-9s %s" % (name, backend.getVersion() if backend.isAvailable() else "not installed"))
+        return 0
+
+    try:
+        jobs = batch.findDocuments(args.input_dir, args.documents)
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.command == "dump":
+        for job in jobs:
+            print("written " + writeDump(job["pdf"], pdf_text.getPagesFromPDF(job["pdf"]), not args.plain))
+        return 0
+
+    names = getAvailableBackends() if args.backends is None else args.backends.split(",")
+    if args.backends is None and not any(TextDumpBackend().getDumpPath(job["pdf"]) for job in jobs):
+        names.remove("textdump")
+
+    try:
+        results = benchmarkBackends(jobs, names, repeat=args.repeat, report=printBenchmark)
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.output is not None:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    return 0
@@ -0,0 +1,228 @@
+"""
+    Batch extraction of a corpus of requirements documents.
+
+    The documents are taken from a manifest or from a whole input folder. Every document is
+    extracted in a process of its own, so a crashing or hanging extraction does not affect
+    the other documents. At most `processes` documents run at the same time; large PDFs are
+    started first. The results are reported in manifest order, independent of the order in
+    which the documents finish.
+
+    MANIFEST FORMAT (JSON):
+    [{"pdf": "input/SAVOIR-GS-001.pdf", "acronyms": "...", "extractor": "ex_SAVOIR_GS"}, ...]
+
+    Only "pdf" is mandatory, relative paths are relative to the manifest.
+
+    With a progress callback, the workers send the progress events of their documents (see
+    progress.py) to the parent while they run, e.g. to a progress.Display.
+
+"""
+
+import json
+import multiprocessing
+import os
+import time
+import traceback
+from multiprocessing.connection import wait
+
+from lib import progress, registry
+
+#___________________________________________________________________________________________________
+def findDocuments(input_dir, keys=None):
+    """
+        Creates a job for every registered PDF in the input folder (optional: only the given
+        document keys), sorted by file name.
+    """
+
+    jobs = []
+
+    for name in sorted(os.listdir(input_dir)):
+        key, extension = os.path.splitext(name)
+
+        if extension.lower() != ".pdf" or key not in registry.DOCUMENTS:
+            continue
+        if keys and key not in keys:
+            continue
+
+        jobs.append(registry.makeJob(os.path.join(input_dir, name)))
+
+    if keys:
+        missing = set(keys) - set(job["key"] for job in jobs)
+        if len(missing) > 0:
+            raise ValueError("Documents not found in " + input_dir + ": " + ", ".join(sorted(missing)))
+
+    return jobs
+
+#___________________________________________________________________________________________________
+def loadManifest(path_to_manifest):
+    """
+        Creates the jobs listed in a manifest file.
+    """
+
+    base_dir = os.path.dirname(path_to_manifest)
+
+    with open(path_to_manifest, "r") as f:
+        entries = json.load(f)
+
+    jobs = []
+    for entry in entries:
+        pdf = os.path.join(base_dir, entry["pdf"])
+        acronyms = entry.get("acronyms")
+        if acronyms:
+            acronyms = os.path.join(base_dir, acronyms)
+
+        jobs.append(registry.makeJob(pdf, acronyms, entry.get("extractor")))
+
+    return jobs
+
+#___________________________________________________________________________________________________
+def runJob(job, connection, report_progress=False):
+    """
+        Extracts one document. Runs in a worker process and sends the result to the parent,
+        with report_progress also the progress events before it.
+    """
+
+    start = time.perf_counter()
+
+    if report_progress:
+        progress.configure(callback=connection.send)
+
+    try:
+        module = registry.loadExtractor(job["extractor"])
+        count = module.extract(job["pdf"], job["acronyms"], **job.get("options", {}))
+        result = {"status": "ok", "requirements": count, "error": ""}
+    except Exception:
+        result = {"status": "failed", "requirements": None, "error": traceback.format_exc()}
+
+    result["seconds"] = time.perf_counter() - start
+    connection.send(result)
+    connection.close()
+
+#___________________________________________________________________________________________________
+def receiveResult(job, receiver, report_progress=None):
+    """
+        Reads the messages of a worker that are ready. Progress events are passed on with the
+        key of the job. Returns the result of the job, or None if it is not there yet.
+        Raises EOFError if the worker exited without result.
+    """
+
+    while receiver.poll():
+        message = receiver.recv()
+
+        if message.get("event") != "progress":
+            return message
+        if report_progress is not None:
+            report_progress(dict(message, key=job["key"]))
+
+    return None
+
+#___________________________________________________________________________________________________
+def getSize(path):
+    """
+        Returns the size of a file, 0 if it cannot be read.
+    """
+
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+#___________________________________________________________________________________________________
+def runBatch(jobs, processes=None, timeout=None, report=None, report_progress=None):
+    """
+        Extracts all jobs in parallel worker processes.
+
+        processes: maximum number of documents extracted at the same time (default: CPU count)
+        timeout: seconds after which the extraction of a single document is killed
+        report: called with every result, in job order, as soon as all previous jobs are done
+        report_progress: called with the progress events of the running jobs, and with an event
+                         {"event": "progress", "key": key, "done": True} when a job has ended
+
+        Returns one result dictionary per job, in job order: the job with "status" ("ok",
+        "failed" or "timeout"), "requirements" (number extracted, None unless ok), "seconds" and
+        "error".
+    """
+
+    if processes is None:
+        processes = os.cpu_count() or 1
+    if processes < 1:
+        raise ValueError("processes must be at least 1, not " + str(processes))
+
+    # start the largest documents first to shorten the total run time
+    pending = sorted(range(len(jobs)), key=lambda i: -getSize(jobs[i]["pdf"]))
+    running = {}
+    results = [None] * len(jobs)
+    reported = 0
+
+    while len(pending) > 0 or len(running) > 0:
+
+        while len(pending) > 0 and len(running) < processes:
+            index = pending.pop(0)
+
+            # a job with missing inputs fails on its own, the other jobs still run
+            missing = registry.getMissingInputs(jobs[index])
+            if len(missing) > 0:
+                results[index] = dict(jobs[index], status="failed", requirements=None, seconds=None,
+                                      error="input not found: " + ", ".join(missing))
+                if report_progress is not None:
+                    report_progress({"event": "progress", "key": jobs[index]["key"], "done": True})
+                continue
+
+            receiver, sender = multiprocessing.Pipe(duplex=False)
+            process = multiprocessing.Process(target=runJob, args=(jobs[index], sender, report_progress is not None))
+            process.start()
+            sender.close()
+            deadline = None if timeout is None else time.monotonic() + timeout
+            running[process.sentinel] = (index, process, receiver, deadline)
+
+        deadlines = [entry[3] for entry in running.values() if entry[3] is not None]
+        wait_time = None if len(deadlines) == 0 else max(0, min(deadlines) - time.monotonic())
+        ready = wait([entry[2] for entry in running.values()] + list(running.keys()), wait_time) if len(running) > 0 else []
+
+        for sentinel in list(running.keys()):
+            index, process, receiver, deadline = running[sentinel]
+            result = None
+
+            if receiver in ready or sentinel in ready:
+                try:
+                    result = receiveResult(jobs[index], receiver, report_progress)
+                except EOFError:
+                    process.join()
+                    result = {"status": "failed", "requirements": None, "seconds": None,
+                              "error": "worker exited with code " + str(process.exitcode)}
+
+            if result is None and deadline is not None and time.monotonic() >= deadline:
+                process.terminate()
+                result = {"status": "timeout", "requirements": None, "seconds": timeout,
+                          "error": "extraction exceeded " + str(timeout) + " seconds"}
+
+            if result is None:
+                continue
+
+            process.join()
+            receiver.close()
+            del running[sentinel]
+            results[index] = dict(jobs[index], **result)
+
+            if report_progress is not None:
+                report_progress({"event": "progress", "key": jobs[index]["key"], "done": True})
+
+        while reported < len(results) and results[reported] is not None:
+            if report is not None:
+                report(results[reported])
+            reported += 1
+
+    return results
+
+#___________________________________________________________________________________________________
+def printResult(result):
+    """
+        Prints the result of one document to the console.
+    """
+
+    seconds = "" if result["seconds"] is None else " (" + format(result["seconds"], ".2f") + " s)"
+    print("[" + result["status"] + "] " + result["key"] + seconds)
+
+    if result["requirements"] is not None:
+        print("    " + str(result["requirements"]) + " requirements extracted.")
+    for line in result["error"].splitlines():
+        print("    " + line)
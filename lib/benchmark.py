@@ -0,0 +1,206 @@
+"""
+    Benchmark of the extraction stages over the documents in the input folder.
+
+    Every registered document is extracted stage by stage and every stage is timed on its own:
+    "pdf_text"      decoding of the PDF pages (always without the page cache)
+    "segment"       boilerplate removal, segmentation and cleaning of the requirements
+    "acronyms"      acronym resolution
+    "write"         formatting and writing of the output file (into a temporary folder)
+
+    Every stage runs `warmup` times untimed and `repeat` times timed. The results are saved as
+    JSON, two result files can be compared to find regressions.
+
+    RESULT FORMAT (JSON):
+    {"meta": {...}, "documents": {key: {stage: {"median": s, "min": s, "mean": s, "samples": [...]}}}}
+
+"""
+
+import json
+import os
+import platform
+import statistics
+import tempfile
+import time
+
+from lib import acronyms, batch, engine, pdf_text, registry
+
+STAGES = ("pdf_text", "segment", "acronyms", "write")
+
+#___________________________________________________________________________________________________
+def measure(function, warmup=1, repeat=5):
+    """
+        Calls function warmup + repeat times and returns the timing summary of the timed calls
+        and the result of the last call.
+    """
+
+    for _ in range(0, warmup):
+        result = function()
+
+    samples = []
+    for _ in range(0, repeat):
+        start = time.perf_counter()
+        result = function()
+        samples.append(time.perf_counter() - start)
+
+    summary = {"median": statistics.median(samples), "min": min(samples),
+               "mean": statistics.mean(samples), "samples": samples}
+
+    return summary, result
+
+#___________________________________________________________________________________________________
+def benchmarkDocument(job, warmup=1, repeat=5):
+    """
+        Times every stage of the extraction of one document.
+    """
+
+    profile = registry.loadExtractor(job["extractor"]).PROFILE
+    pipeline = engine.compileProfile(profile)
+    strip_title = profile.get("strip_title", False)
+    timings = {}
+
+    def decode():
+        page_count, pages = pdf_text.decodePages(job["pdf"])
+        return [pages[i] for i in range(0, page_count)]
+
+    timings["pdf_text"], pages = measure(decode, warmup, repeat)
+    timings["segment"], reqs = measure(lambda: pipeline.runPages(pages), warmup, repeat)
+
+    if job["acronyms"] != "":
+        timings["acronyms"], reqs = measure(
+            lambda: acronyms.resolveAcronyms(list(reqs), job["acronyms"]), warmup, repeat)
+
+    with tempfile.TemporaryDirectory() as directory:
+        output_path = os.path.join(directory, job["key"] + ".txt")
+        timings["write"], _ = measure(
+            lambda: engine.saveRequirements(reqs, job["pdf"], strip_title, output_path), warmup, repeat)
+
+    timings["requirements"] = len(reqs)
+
+    return timings
+
+#___________________________________________________________________________________________________
+def runBenchmark(jobs, warmup=1, repeat=5, report=None):
+    """
+        Benchmarks all jobs one after another and returns the result dictionary.
+        report is called with the key and the timings of every finished document.
+    """
+
+    results = {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "backend": pdf_text.getBackendVersion(),
+            "warmup": warmup,
+            "repeat": repeat,
+        },
+        "documents": {},
+    }
+
+    for job in jobs:
+        timings = benchmarkDocument(job, warmup, repeat)
+
+        results["documents"][job["key"]] = timings
+        if report is not None:
+            report(job["key"], timings)
+
+    return results
+
+#___________________________________________________________________________________________________
+def compareResults(old, new, threshold=0.1, minimum=0.001):
+    """
+        Compares the median times of two benchmark results.
+
+        threshold: relative slowdown reported as regression, e.g. 0.1 = 10 %
+        minimum: absolute slowdown in seconds below which a stage is never a regression
+
+        Returns a list of (document, stage, old median, new median, ratio, regression).
+    """
+
+    rows = []
+
+    for key, timings in new["documents"].items():
+        if key not in old["documents"]:
+            continue
+
+        for stage in STAGES:
+            if stage not in timings or stage not in old["documents"][key]:
+                continue
+
+            before = old["documents"][key][stage]["median"]
+            after = timings[stage]["median"]
+            ratio = after / before if before > 0 else float("inf")
+            regression = ratio > 1 + threshold and after - before > minimum
+
+            rows.append((key, stage, before, after, ratio, regression))
+
+    return rows
+
+#___________________________________________________________________________________________________
+def printTimings(key, timings):
+    """
+        Prints the median times of one benchmarked document.
+    """
+
+    stages = ["%s %.4f s" % (stage, timings[stage]["median"]) for stage in STAGES if stage in timings]
+    print(key + ": " + ", ".join(stages) + " (" + str(timings["requirements"]) + " requirements)")
+
+#___________________________________________________________________________________________________
+def main(argv):
+    """
+        Command line of the benchmark, see main.py.
+    """
+
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="main.py bench", description="Benchmark the extraction stages.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="benchmark the documents of the input folder")
+    run.add_argument("documents", nargs="*", help="document keys (default: all)")
+    run.add_argument("--input-dir", default="input", help="folder with the PDFs (default: input)")
+    run.add_argument("--warmup", type=int, default=1, help="untimed runs per stage (default: 1)")
+    run.add_argument("--repeat", type=int, default=5, help="timed runs per stage (default: 5)")
+    run.add_argument("--output", default="benchmark.json", help="result file (default: benchmark.json)")
+
+    compare = commands.add_parser("compare", help="compare two result files")
+    compare.add_argument("old", help="result file of the baseline")
+    compare.add_argument("new", help="result file of the change")
+    compare.add_argument("--threshold", type=float, default=0.1, help="relative slowdown flagged as regression (default: 0.1)")
+    compare.add_argument("--minimum", type=float, default=0.001, help="ignore slowdowns below this many seconds (default: 0.001)")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        if args.repeat < 1:
+            run.error("--repeat must be at least 1")
+        if args.warmup < 0:
+            run.error("--warmup must not be negative")
+
+        try:
+            jobs = batch.findDocuments(args.input_dir, args.documents)
+        except ValueError as e:
+            parser.error(str(e))
+
+        results = runBenchmark(jobs, args.warmup, args.repeat, report=printTimings)
+
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print("Results saved in " + args.output)
+        return 0
+
+    with open(args.old, "r") as f:
+        old = json.load(f)
+    with open(args.new, "r") as f:
+        new = json.load(f)
+
+    rows = compareResults(old, new, args.threshold, args.minimum)
+    regressions = 0
+
+    for key, stage, before, after, ratio, regression in rows:
+        flag = "REGRESSION" if regression else ""
+        print("%-24s %-9s %9.4f s -> %9.4f s %7.2fx %s" % (key, stage, before, after, ratio, flag))
+        regressions += regression
+
+    print(str(regressions) + " regressions above " + format(args.threshold * 100, "g") + " %.")
+    return 1 if regressions > 0 else 0
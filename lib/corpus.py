@@ -0,0 +1,210 @@
+"""
+    Binary corpus file of the extracted requirements with random access.
+
+    The requirements of all documents are stored in one file: the UTF-8 text of all
+    requirements concatenated, followed by an index with one fixed-width entry per requirement
+    and a string table. A reader maps the file with mmap and returns the n-th requirement in
+    O(1), without reading or parsing the rest of the file.
+
+    FILE LAYOUT (little endian):
+    header          magic "SRQC", version, record count, offset of the index, offset and length
+                    of the string table (HEADER)
+    payload         requirement texts, UTF-8, without separators
+    index           per requirement: payload offset, length in bytes, document and chapter
+                    (indices in the string table), ordinal in the document, first and last
+                    page in the PDF (ENTRY)
+    string table    JSON list of the document names and chapters
+
+    The text of a requirement is the line of the output file (with [SEP]/[END] markers).
+    The identifiers of the requirements are indexed in a separate file, see id_index.py.
+
+"""
+
+import json
+import mmap
+import os
+import struct
+
+from lib import engine, id_index, registry
+
+MAGIC = b"SRQC"
+VERSION = 2
+HEADER = struct.Struct("<4sIQQQQ")
+ENTRY = struct.Struct("<QIIIIII")
+
+#___________________________________________________________________________________________________
+def writeCorpus(path, records):
+    """
+        Writes records (dictionaries with "document", "chapter", "ordinal", "first_page",
+        "last_page" and "text", see engine.getRecords) to a corpus file. The file is replaced atomically.
+        Returns the number of records.
+    """
+
+    strings = {}
+    entries = []
+    temp_path = path + ".tmp"
+
+    with open(temp_path, "wb") as f:
+        f.write(b"\0" * HEADER.size)
+        offset = HEADER.size
+
+        for record in records:
+            data = record["text"].encode("utf-8")
+            f.write(data)
+
+            document = strings.setdefault(record["document"], len(strings))
+            chapter = strings.setdefault(record["chapter"], len(strings))
+            entries.append(ENTRY.pack(offset, len(data), document, chapter, record["ordinal"],
+                                      record["first_page"], record["last_page"]))
+            offset += len(data)
+
+        index_offset = offset
+        f.write(b"".join(entries))
+
+        string_table = json.dumps(list(strings)).encode("utf-8")
+        strings_offset = index_offset + len(entries) * ENTRY.size
+        f.write(string_table)
+
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, VERSION, len(entries), index_offset, strings_offset, len(string_table)))
+
+    os.replace(temp_path, path)
+
+    return len(entries)
+
+#___________________________________________________________________________________________________
+class CorpusReader:
+    """
+        Memory-mapped read access to a corpus file.
+
+        reader[n]           n-th requirement as dictionary (document, chapter, ordinal,
+                            first_page, last_page, text)
+        reader.getText(n)   text of the n-th requirement only
+        len(reader)         number of requirements
+    """
+
+    def __init__(self, path):
+
+        self.file = open(path, "rb")
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, self.count, self.index_offset, strings_offset, strings_length = \
+            HEADER.unpack_from(self.map, 0)
+
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(path + " is no corpus file of version " + str(VERSION))
+
+        self.strings = json.loads(self.map[strings_offset:strings_offset + strings_length].decode("utf-8"))
+
+    def __len__(self):
+
+        return self.count
+
+    def getEntry(self, n):
+
+        if n < 0:
+            n += self.count
+        if n < 0 or n >= self.count:
+            raise IndexError("requirement index out of range")
+
+        return ENTRY.unpack_from(self.map, self.index_offset + n * ENTRY.size)
+
+    def getText(self, n):
+
+        offset, length = self.getEntry(n)[:2]
+
+        return self.map[offset:offset + length].decode("utf-8")
+
+    def __getitem__(self, n):
+
+        offset, length, document, chapter, ordinal, first_page, last_page = self.getEntry(n)
+
+        return {"document": self.strings[document], "chapter": self.strings[chapter],
+                "ordinal": ordinal, "first_page": first_page, "last_page": last_page,
+                "text": self.map[offset:offset + length].decode("utf-8")}
+
+    def __iter__(self):
+
+        for n in range(0, self.count):
+            yield self[n]
+
+    def close(self):
+
+        self.map.close()
+        self.file.close()
+
+    def __enter__(self):
+
+        return self
+
+    def __exit__(self, kind, value, trace):
+
+        self.close()
+        return False
+
+#___________________________________________________________________________________________________
+def buildCorpus(jobs, path, report=None):
+    """
+        Extracts the requirements of all jobs with their metadata and writes the corpus file
+        and the ID index of the corpus (same path with extension .idx, see id_index.py).
+        report is called with the key and the number of requirements of every document.
+    """
+
+    records = []
+
+    for job in jobs:
+        profile = registry.loadExtractor(job["extractor"]).PROFILE
+        document_records = engine.getRecords(profile, job["pdf"], job["acronyms"])
+
+        records.extend(document_records)
+        if report is not None:
+            report(job["key"], len(document_records))
+
+    id_index.writeIdIndex(os.path.splitext(path)[0] + ".idx", records)
+
+    return writeCorpus(path, records)
+
+#___________________________________________________________________________________________________
+def main(argv):
+    """
+        Command line of the corpus file, see main.py.
+    """
+
+    import argparse
+
+    from lib import batch
+
+    parser = argparse.ArgumentParser(prog="main.py corpus", description="Build and read the binary corpus file.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build = commands.add_parser("build", help="extract the documents into a corpus file and an ID index")
+    build.add_argument("documents", nargs="*", help="document keys (default: all)")
+    build.add_argument("--input-dir", default="input", help="folder with the PDFs (default: input)")
+    build.add_argument("--output", default="output/corpus.srq", help="corpus file (default: output/corpus.srq)")
+
+    show = commands.add_parser("show", help="print requirements of a corpus file")
+    show.add_argument("numbers", nargs="*", type=int, help="requirement numbers (default: summary only)")
+    show.add_argument("--corpus", default="output/corpus.srq", help="corpus file (default: output/corpus.srq)")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        try:
+            jobs = batch.findDocuments(args.input_dir, args.documents)
+        except ValueError as e:
+            parser.error(str(e))
+
+        count = buildCorpus(jobs, args.output, report=lambda key, n: print(key + ": " + str(n) + " requirements"))
+        print(str(count) + " requirements saved in " + args.output)
+        return 0
+
+    with CorpusReader(args.corpus) as reader:
+        print(args.corpus + ": " + str(len(reader)) + " requirements")
+        for n in args.numbers:
+            record = reader[n]
+            print("[" + str(n) + "] " + record["document"] + " " + record["chapter"] + " #" + str(record["ordinal"])
+                  + " " + engine.getPageLabel(record))
+            print("    " + record["text"])
+
+    return 0
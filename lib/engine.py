@@ -0,0 +1,818 @@
+"""
+    Extraction engine shared by all ex_*.py modules.
+
+    Every module describes its document with a PROFILE dictionary. The engine compiles a
+    profile once into a pipeline (compiled regular expressions, plain string operations for
+    literal patterns) and runs it on the text of the document.
+
+    PROFILE FORMAT:
+    "document"      name of the document, used in messages and as cache key of the pipeline
+    "furniture"     remove running headers and footers automatically (default: False),
+                    see furniture.py
+    "boilerplate"   operations applied to the full text, e.g. to remove headers and footers
+    "segments"      split tree, see below
+    "requirement"   operations applied to every single requirement
+    "drop_blank"    drop requirements consisting of whitespace only (default: True)
+    "drop_containing"   drop requirements containing one of the given strings
+    "suffix"        appended to every requirement, e.g. "[END]"
+    "strip_title"   write a requirement from the first lowercase-uppercase transition on,
+                    this removes a leading requirement title (default: False)
+    "id"            regular expression matching the identifier of a requirement. The first match
+                    in the raw requirement (including the split heading in front of it) is kept
+                    as "id" of the requirement records, see getRecords
+    "chapters"      regular expression matching the bookmark titles of the top level chapters
+                    holding requirements. If the PDF has such bookmarks, only the pages of these
+                    chapters are decoded, and the split tree is applied to their text only
+                    (skip counts refer to this text). Without bookmarks all pages are used.
+
+    OPERATIONS:
+    ("sub", pattern[, replacement])     regular expression substitution
+    ("sub", [pattern, ...][, replacement])
+                                        fused substitution: all patterns in one pass, at every
+                                        position the first matching pattern wins. Only
+                                        equivalent to the single substitutions in sequence if
+                                        they do not interact, check with "main.py rules"
+    ("replace", text[, replacement])    literal substitution
+    ("cut", pattern)                    keep the text in front of the first match only
+
+    SPLIT TREE:
+    {"split": pattern, "skip": n, "each": node}     split, drop the first n parts and apply
+                                                    node to every remaining part
+    {"split": pattern, "skip": n, "parts": [node, ...], "rest": node}
+                                                    apply the i-th node to the i-th part and
+                                                    "rest" (optional) to all further parts
+    A node without "each", "parts" and "rest" produces one requirement per part.
+
+"""
+
+import re
+import unicodedata
+from array import array
+
+from lib import acronyms, furniture, metrics, pdf_text, progress, stream, writer
+
+SECTION = re.compile(r"[0-9]+(?:\.[0-9]+)*")
+POSITIONAL = re.compile(r"[\^$]|\\[bBAZ]|\(\?<[=!]")
+WHITESPACE = re.compile(r"\s+")
+NON_WHITESPACE = re.compile(r"\S")
+
+_pipelines = {}
+
+#___________________________________________________________________________________________________
+def getLiteral(pattern):
+    """
+        Returns the plain text matched by a pattern without special characters, or None.
+        Such patterns are executed with string methods instead of the regex engine.
+    """
+
+    literal = []
+    escaped = False
+
+    for c in pattern:
+        if escaped:
+            if c.isalnum():
+                return None
+            literal.append(c)
+            escaped = False
+        elif c == "\\":
+            escaped = True
+        elif c in ".^$*+?{}[]|()":
+            return None
+        else:
+            literal.append(c)
+
+    if escaped or len(literal) == 0:
+        return None
+
+    return "".join(literal)
+
+#___________________________________________________________________________________________________
+def getPattern(operation):
+    """
+        Returns the regular expression matching what an operation replaces or cuts: the
+        alternation of the patterns of a fused substitution, the escaped text of "replace".
+    """
+
+    if isinstance(operation[1], list):
+        return "|".join("(?:" + p + ")" for p in operation[1])
+
+    if operation[0] == "replace":
+        return re.escape(operation[1])
+
+    return operation[1]
+
+#___________________________________________________________________________________________________
+def compileOperation(operation):
+    """
+        Compiles one operation of a profile into a function text -> text.
+    """
+
+    kind, pattern = operation[0], operation[1]
+    replacement = operation[2] if len(operation) > 2 else ""
+
+    if kind == "sub" and isinstance(pattern, list):
+        regex = re.compile(getPattern(operation))
+        return lambda text: regex.sub(replacement, text)
+
+    if kind == "replace":
+        return lambda text: text.replace(pattern, replacement)
+
+    literal = getLiteral(pattern)
+
+    if kind == "sub":
+        if literal is not None and "\\" not in replacement:
+            return lambda text: text.replace(literal, replacement)
+        regex = re.compile(pattern)
+        return lambda text: regex.sub(replacement, text)
+
+    if kind == "cut":
+        if literal is not None:
+            return lambda text: text.split(literal, 1)[0]
+        regex = re.compile(pattern)
+        return lambda text: regex.split(text, 1)[0]
+
+    raise ValueError("Unknown operation " + repr(kind))
+
+#___________________________________________________________________________________________________
+def compileEdits(operation):
+    """
+        Compiles one operation of a profile into a function text -> list of the edits the
+        operation makes to the text: (start, end, length of the replacement), in text order.
+        The edits are found with the same matches as compileOperation.
+    """
+
+    kind, pattern = operation[0], operation[1]
+    replacement = operation[2] if len(operation) > 2 else ""
+
+    if isinstance(pattern, list):
+        pattern = getPattern(operation)
+
+    if kind == "replace":
+        literal = pattern
+    elif kind == "sub" and "\\" in replacement:
+        literal = None
+    else:
+        literal = getLiteral(pattern)
+
+    if kind not in ("sub", "replace", "cut"):
+        raise ValueError("Unknown operation " + repr(kind))
+
+    if kind == "cut" and literal is not None:
+        def edits(text):
+            match = text.find(literal)
+            return [] if match == -1 else [(match, len(text), 0)]
+
+        return edits
+
+    if literal is not None:
+        def edits(text):
+            found = []
+            match = text.find(literal)
+            while match != -1:
+                found.append((match, match + len(literal), len(replacement)))
+                match = text.find(literal, match + max(len(literal), 1))
+            return found
+
+        return edits
+
+    regex = re.compile(pattern)
+
+    if kind == "cut":
+        def edits(text):
+            match = regex.search(text)
+            return [] if match is None else [(match.start(), len(text), 0)]
+
+        return edits
+
+    if "\\" in replacement:
+        return lambda text: [(m.start(), m.end(), len(m.expand(replacement))) for m in regex.finditer(text)]
+
+    return lambda text: [(m.start(), m.end(), len(replacement)) for m in regex.finditer(text)]
+
+#___________________________________________________________________________________________________
+def shiftOffsets(offsets, edits):
+    """
+        Maps ascending positions of a text to the text after the edits (see compileEdits).
+        A position inside an edited range is mapped to the end of its replacement.
+    """
+
+    shifted = array("q")
+    shift = 0
+    k = 0
+
+    for position in offsets:
+        while k < len(edits) and edits[k][1] <= position:
+            start, end, length = edits[k]
+            shift += length - (end - start)
+            k += 1
+
+        if k < len(edits) and edits[k][0] < position:
+            start, end, length = edits[k]
+            shifted.append(start + shift + length)
+        else:
+            shifted.append(position + shift)
+
+    return shifted
+
+#___________________________________________________________________________________________________
+def isPositional(pattern):
+    """
+        Checks if a pattern looks at the text around a match (anchors, word boundaries,
+        lookbehind). Such a pattern can match differently on a span of a text than on the
+        span cut out as a string.
+    """
+
+    return POSITIONAL.search(pattern) is not None
+
+#___________________________________________________________________________________________________
+def compileSplit(pattern):
+    """
+        Compiles a split pattern into a function (text, start, end) -> list of spans.
+
+        The spans divide text[start:end] like re.split: one span (heading start, part start,
+        part end) per part, the heading is the match in front of the part (empty for the first
+        part) and ends where the part starts. No part is copied out of the text.
+    """
+
+    literal = getLiteral(pattern)
+
+    if literal is not None:
+        def split(text, start, end):
+            spans = []
+            heading = start
+            position = start
+            match = text.find(literal, start, end)
+            while match != -1:
+                spans.append((heading, position, match))
+                heading = match
+                position = match + len(literal)
+                match = text.find(literal, position, end)
+            spans.append((heading, position, end))
+            return spans
+
+        return split
+
+    regex = re.compile(pattern)
+    positional = isPositional(pattern)
+
+    def split(text, start, end):
+        spans = []
+        heading = start
+        position = start
+
+        if positional:
+            matches = ((m.start() + start, m.end() + start) for m in regex.finditer(text[start:end]))
+        else:
+            matches = (m.span() for m in regex.finditer(text, start, end))
+
+        for match_start, match_end in matches:
+            spans.append((heading, position, match_start))
+            heading = match_start
+            position = match_end
+
+        spans.append((heading, position, end))
+        return spans
+
+    return split
+
+#___________________________________________________________________________________________________
+def compileCut(pattern):
+    """
+        Compiles a "cut" operation into a function (text, start, end) -> new end of the span,
+        or returns None if the pattern has to see the requirement as a string.
+    """
+
+    literal = getLiteral(pattern)
+
+    if literal is not None:
+        def cut(text, start, end):
+            match = text.find(literal, start, end)
+            return end if match == -1 else match
+
+        return cut
+
+    if isPositional(pattern):
+        return None
+
+    regex = re.compile(pattern)
+
+    def cut(text, start, end):
+        match = regex.search(text, start, end)
+        return end if match is None else match.start()
+
+    return cut
+
+#___________________________________________________________________________________________________
+def normalizeId(req_id):
+    """
+        Returns the normalized form of a requirement identifier: ligatures of the PDF text
+        resolved ("ﬁ" -> "fi") and whitespace removed ("MPVM -FC-010" -> "MPVM-FC-010").
+    """
+
+    return WHITESPACE.sub("", unicodedata.normalize("NFKC", req_id))
+
+#___________________________________________________________________________________________________
+def getSection(heading):
+    """
+        Returns the section number of a split heading (e.g. "7.1.2" for "7.1.2 " or "3.2.")
+        or "" if the heading is no section number.
+    """
+
+    heading = heading.strip().rstrip(".")
+
+    return heading if SECTION.fullmatch(heading) is not None else ""
+
+#___________________________________________________________________________________________________
+def getPageRange(page_offsets, text, start, end):
+    """
+        Returns the indices of the first and the last page of the span text[start:end] (see
+        pdf_text.getPageOffsets), without leading and trailing whitespace.
+    """
+
+    if start < end and text[start].isspace():
+        match = NON_WHITESPACE.search(text, start, end)
+        if match is not None:
+            start = match.start()
+
+    last = end - 1
+    while last > start and text[last].isspace():
+        last -= 1
+
+    return pdf_text.getPageIndex(page_offsets, start), pdf_text.getPageIndex(page_offsets, max(last, start))
+
+#___________________________________________________________________________________________________
+class Pipeline:
+    """
+        Compiled form of a profile.
+    """
+
+    def __init__(self, profile):
+
+        self.profile = profile
+        self.document = profile["document"]
+        self.furniture = profile.get("furniture", False)
+        self.boilerplate = [compileOperation(o) for o in profile.get("boilerplate", [])]
+        self.boilerplate_edits = [compileEdits(o) for o in profile.get("boilerplate", [])]
+        self.segments = self.compileNode(profile["segments"])
+        self.requirement = [compileOperation(o) for o in profile.get("requirement", [])]
+        self.cuts = self.compileCuts(profile.get("requirement", []))
+        self.after_cuts = self.requirement[len(self.cuts):]
+        self.drop_blank = profile.get("drop_blank", True)
+        self.drop_containing = tuple(profile.get("drop_containing", []))
+        self.suffix = profile.get("suffix", "")
+        self.id = re.compile(profile["id"]) if "id" in profile else None
+        self.id_positional = "id" in profile and isPositional(profile["id"])
+        self.dropped_blank = 0
+        self.dropped_containing = 0
+
+    #_______________________________________________________________________________________________
+    def compileNode(self, node):
+
+        if node is None:
+            return None
+
+        return {
+            "split": compileSplit(node["split"]),
+            "skip": node.get("skip", 0),
+            "each": self.compileNode(node.get("each")),
+            "parts": [self.compileNode(n) for n in node.get("parts", [])],
+            "rest": self.compileNode(node.get("rest")),
+            "leaf": "each" not in node and "parts" not in node and "rest" not in node,
+        }
+
+    #_______________________________________________________________________________________________
+    def compileCuts(self, operations):
+        """
+            Compiles the leading "cut" operations of the requirement operations into functions
+            on spans, see compileCut. They shorten the span of a requirement before it is cut
+            out of the text.
+        """
+
+        cuts = []
+
+        for operation in operations:
+            cut = compileCut(operation[1]) if operation[0] == "cut" else None
+            if cut is None:
+                break
+            cuts.append(cut)
+
+        return cuts
+
+    #_______________________________________________________________________________________________
+    def segment(self, node, text, start, end, output):
+        """
+            Applies the split tree to the span text[start:end] and appends the span of every
+            requirement (heading start, start, end) to output.
+        """
+
+        parts = node["split"](text, start, end)
+        del parts[:node["skip"]]
+
+        if node["leaf"]:
+            output.extend(parts)
+            return
+
+        for i, (_, part_start, part_end) in enumerate(parts):
+            if node["each"] is not None:
+                child = node["each"]
+            elif i < len(node["parts"]):
+                child = node["parts"][i]
+            else:
+                child = node["rest"]
+
+            if child is not None:
+                self.segment(child, text, part_start, part_end, output)
+
+    #_______________________________________________________________________________________________
+    def segmentRecords(self, node, text, start, end, output, chapter=""):
+        """
+            Like segment, but appends (chapter, heading start, start, end) to output. The
+            chapter is the deepest section number matched by a split of the tree, e.g. "7.1.2",
+            the heading is the match of the last split in front of the requirement.
+        """
+
+        parts = node["split"](text, start, end)
+        del parts[:node["skip"]]
+
+        if node["leaf"]:
+            output.extend((getSection(text[heading:part_start]) or chapter, heading, part_start, part_end)
+                          for heading, part_start, part_end in parts)
+            return
+
+        for i, (heading, part_start, part_end) in enumerate(parts):
+            if node["each"] is not None:
+                child = node["each"]
+            elif i < len(node["parts"]):
+                child = node["parts"][i]
+            else:
+                child = node["rest"]
+
+            if child is not None:
+                self.segmentRecords(child, text, part_start, part_end, output,
+                                    getSection(text[heading:part_start]) or chapter)
+
+    #_______________________________________________________________________________________________
+    def cleanRequirement(self, req, operations=None):
+        """
+            Applies the requirement operations (or the given part of them) and filters to one
+            requirement. Returns None if the requirement is dropped.
+        """
+
+        for operation in self.requirement if operations is None else operations:
+            req = operation(req)
+
+        if self.drop_blank and req.isspace():
+            self.dropped_blank += 1
+            return None
+
+        for text in self.drop_containing:
+            if text in req:
+                self.dropped_containing += 1
+                return None
+
+        return req + self.suffix
+
+    #_______________________________________________________________________________________________
+    def cleanSpan(self, text, start, end):
+        """
+            Cuts one requirement out of the text and cleans it: the leading "cut" operations
+            only shorten the span, the requirement is copied once.
+        """
+
+        return self.cleanRequirement(text[start:self.cutSpan(text, start, end)], self.after_cuts)
+
+    #_______________________________________________________________________________________________
+    def cutSpan(self, text, start, end):
+        """
+            Applies the leading "cut" operations to the span of a requirement.
+            Returns the new end of the span.
+        """
+
+        for cut in self.cuts:
+            end = cut(text, start, end)
+
+        return end
+
+    #_______________________________________________________________________________________________
+    def splitText(self, text):
+        """
+            Applies the boilerplate operations and the split tree to a text.
+            Returns the raw requirements, before the requirement operations.
+        """
+
+        text, spans = self.getSpans(text)
+
+        return [text[start:end] for _, start, end in spans]
+
+    #_______________________________________________________________________________________________
+    def getSpans(self, text):
+        """
+            Applies the boilerplate operations to a text and the split tree to the result.
+            Returns the resulting text and the spans of the requirements in it.
+        """
+
+        for operation in self.boilerplate:
+            text = operation(text)
+
+        spans = []
+        self.segment(self.segments, text, 0, len(text), spans)
+
+        return text, spans
+
+    #_______________________________________________________________________________________________
+    def run(self, text):
+        """
+            Splits a given text in single requirements statements.
+        """
+
+        text, spans = self.getSpans(text)
+
+        final_req_list = []
+        for _, start, end in spans:
+            req = self.cleanSpan(text, start, end)
+            if req is not None:
+                final_req_list.append(req)
+
+        return final_req_list
+
+    #_______________________________________________________________________________________________
+    def runRecords(self, pages):
+        """
+            Like runPages, but returns (chapter, id, requirement, first page, last page) tuples,
+            see segmentRecords. The id is "" if the profile has no id pattern or the requirement
+            has no match. The pages are indices into the given pages: the page boundaries are
+            moved along with the edits of the boilerplate operations (see compileEdits).
+        """
+
+        if self.furniture:
+            pages = furniture.removeFurniture(pages)
+
+        text = "".join(pages)
+        page_offsets = pdf_text.getPageOffsets(pages)
+
+        for operation, edits in zip(self.boilerplate, self.boilerplate_edits):
+            found = edits(text)
+            if len(found) > 0:
+                page_offsets = shiftOffsets(page_offsets, found)
+            text = operation(text)
+
+        segments = []
+        self.segmentRecords(self.segments, text, 0, len(text), segments)
+
+        records = []
+        for chapter, heading, start, end in segments:
+            # the heading is directly in front of the requirement
+            if self.id is None:
+                match = None
+            elif self.id_positional:
+                match = self.id.search(text[heading:end])
+            else:
+                match = self.id.search(text, heading, end)
+
+            end = self.cutSpan(text, start, end)
+            req = self.cleanRequirement(text[start:end], self.after_cuts)
+            if req is not None:
+                first_page, last_page = getPageRange(page_offsets, text, start, end)
+                records.append((chapter, "" if match is None else normalizeId(match.group()), req,
+                                first_page, last_page))
+
+        return records
+
+    #_______________________________________________________________________________________________
+    def runPages(self, pages):
+        """
+            Splits the text of the given pages in single requirements statements.
+            Running headers and footers are removed before the pages are concatenated.
+        """
+
+        if self.furniture:
+            pages = furniture.removeFurniture(pages)
+
+        return self.run("".join(pages))
+
+#___________________________________________________________________________________________________
+def compileProfile(profile):
+    """
+        Returns the compiled pipeline of a profile. Every profile is compiled only once.
+    """
+
+    pipeline = _pipelines.get(profile["document"])
+
+    if pipeline is None:
+        pipeline = Pipeline(profile)
+        _pipelines[profile["document"]] = pipeline
+
+    return pipeline
+
+#___________________________________________________________________________________________________
+def getReqsFromText(text, profile):
+    """
+        Splits a given text in single requirements statements, using the rules of the profile.
+    """
+
+    return compileProfile(profile).run(text)
+
+#___________________________________________________________________________________________________
+def getReqsFromPages(pages, profile):
+    """
+        Splits the text of the given pages in single requirements statements, using the rules
+        of the profile. Unlike getReqsFromText, this removes the page furniture if enabled.
+    """
+
+    return compileProfile(profile).runPages(pages)
+
+#___________________________________________________________________________________________________
+def formatRequirement(req, strip_title=False):
+    """
+        Returns the line written to the output file for one requirement.
+    """
+
+    cleaned_req = req.replace("\n", "")
+    title_end = re.search("[a-z][A-Z]", cleaned_req) if strip_title else None
+
+    if title_end is not None:
+        return cleaned_req[title_end.end() - 1:] + "\n"
+
+    return cleaned_req + "\n"
+
+#___________________________________________________________________________________________________
+def saveRequirements(req_list, path_to_doc, strip_title=False, output_path=None, output_dir=None, compression=None):
+    """
+        Save the extracted and cleaned requirements in one text document.
+        Therefore, the file is written to the output folder (see writer.py), unless an
+        output_path is given. The text is assembled in one pass and replaces the file atomically.
+
+        Note: because of complex formatting issues, requirement statement are not splitted
+        from their comments. This needs to be done manually.
+    """
+
+    if output_path is None:
+        output_path = writer.getOutputPath(path_to_doc, output_dir, compression)
+
+    writer.writeOutput(output_path, "".join([formatRequirement(r, strip_title) for r in req_list]), compression)
+
+#___________________________________________________________________________________________________
+def getPageNumbers(profile, path_to_doc):
+    """
+        Returns the pages of the requirement chapters if the profile names them and the PDF has
+        bookmarks, else None (all pages).
+    """
+
+    if "chapters" not in profile:
+        return None
+
+    return pdf_text.getChapterPages(path_to_doc, profile["chapters"])
+
+#___________________________________________________________________________________________________
+def getRecords(profile, path_to_doc, path_to_acronyms=""):
+    """
+        Extracts one document like extract, but returns the requirements with their metadata
+        instead of writing them: a list of dictionaries with the keys "document", "chapter",
+        "id", "ordinal" (line in the output file), "first_page" and "last_page" (page numbers
+        in the PDF, starting at 1) and "text" (output line).
+    """
+
+    pipeline = compileProfile(profile)
+    resolve = acronyms.getMatcher(path_to_acronyms) if path_to_acronyms != "" else None
+    strip_title = profile.get("strip_title", False)
+
+    page_numbers = getPageNumbers(profile, path_to_doc)
+    pages = pdf_text.getPagesFromPDF(path_to_doc, page_numbers)
+    if page_numbers is None:
+        page_numbers = range(0, len(pages))
+
+    records = []
+
+    for ordinal, (chapter, req_id, req, first_page, last_page) in enumerate(pipeline.runRecords(pages)):
+        if resolve is not None:
+            req = resolve(req)
+
+        records.append({"document": pipeline.document, "chapter": chapter, "id": req_id,
+                        "ordinal": ordinal, "first_page": page_numbers[first_page] + 1,
+                        "last_page": page_numbers[last_page] + 1, "text": formatRequirement(req, strip_title)[:-1]})
+
+    return records
+
+#___________________________________________________________________________________________________
+def getPageLabel(record):
+    """
+        Returns the pages of a requirement record for messages, e.g. "p. 12" or "pp. 12-13".
+    """
+
+    if record["first_page"] == record["last_page"]:
+        return "p. " + str(record["first_page"])
+
+    return "pp. " + str(record["first_page"]) + "-" + str(record["last_page"])
+
+#___________________________________________________________________________________________________
+def countPages(pages, stage):
+    """
+        Passes the pages of a page stream through and counts them on a metrics stage.
+    """
+
+    for page in pages:
+        stage.add("pages")
+        stage.add("bytes", len(page))
+        yield page
+
+#___________________________________________________________________________________________________
+def streamRequirements(profile, path_to_doc, path_to_acronyms="", stage=metrics.NULL_STAGE, output_path=None,
+                       page_numbers=None, output_dir=None, compression=None, tracker=progress.NULL_TRACKER):
+    """
+        Streaming variant of the extraction: pages are decoded one after another and every
+        requirement is resolved and written as soon as it is complete (see stream.py).
+        Returns the number of written requirements.
+    """
+
+    pipeline = compileProfile(profile)
+    resolve = acronyms.getMatcher(path_to_acronyms) if path_to_acronyms != "" else None
+    strip_title = profile.get("strip_title", False)
+    dropped = (pipeline.dropped_blank, pipeline.dropped_containing)
+    substitutions = resolve.substitutions if resolve is not None else 0
+    count = 0
+
+    pages = countPages(pdf_text.iterPagesFromPDF(path_to_doc, page_numbers=page_numbers, tracker=tracker), stage)
+
+    if output_path is None:
+        output_path = writer.getOutputPath(path_to_doc, output_dir, compression)
+
+    with writer.openOutput(output_path, compression) as f:
+        for req in stream.iterRequirements(pipeline, pages):
+            if resolve is not None:
+                req = resolve(req)
+            f.write(formatRequirement(req, strip_title))
+            tracker.requirement()
+            count += 1
+
+    stage.add("requirements", count)
+    stage.add("dropped_blank", pipeline.dropped_blank - dropped[0])
+    stage.add("dropped_containing", pipeline.dropped_containing - dropped[1])
+    if resolve is not None:
+        stage.add("substitutions", resolve.substitutions - substitutions)
+
+    return count
+
+#___________________________________________________________________________________________________
+def extract(profile, path_to_doc, path_to_acronyms="", stream=False, output_path=None, output_dir=None,
+            compression=None):
+    """
+        Runs the full extraction of one document: text, requirements, acronyms, output file.
+        With stream=True the document is processed page by page with bounded memory.
+        output_path replaces the default output file in the output folder, output_dir the
+        output folder; compression is None, "gzip" or "lzma" (see writer.py).
+        Every stage is measured, see metrics.py, and the decoded pages and the extracted
+        requirements are reported to the progress callbacks, see progress.py.
+        Returns the number of extracted requirements.
+    """
+
+    document = profile["document"]
+    tracker = progress.track(document)
+    page_numbers = None
+
+    if "chapters" in profile:
+        with metrics.stage(document, "outline") as s:
+            page_numbers = getPageNumbers(profile, path_to_doc)
+            s.add("pages", 0 if page_numbers is None else len(page_numbers))
+
+    if stream:
+        with metrics.stage(document, "stream") as s:
+            count = streamRequirements(profile, path_to_doc, path_to_acronyms, s, output_path, page_numbers,
+                                       output_dir, compression, tracker)
+        tracker.finish()
+        return count
+
+    with metrics.stage(document, "pdf_text") as s:
+        cache = pdf_text.getCache()
+        hits, misses = (cache.hits, cache.misses) if cache is not None else (0, 0)
+        pages = pdf_text.getPagesFromPDF(path_to_doc, page_numbers, tracker)
+        s.add("pages", len(pages))
+        s.add("bytes", sum(map(len, pages)))
+        if cache is not None:
+            s.add("cache_hits", cache.hits - hits)
+            s.add("cache_misses", cache.misses - misses)
+
+    with metrics.stage(document, "segment") as s:
+        pipeline = compileProfile(profile)
+        dropped = (pipeline.dropped_blank, pipeline.dropped_containing)
+        reqs = getReqsFromPages(pages, profile)
+        tracker.requirement(len(reqs))
+        s.add("requirements", len(reqs))
+        s.add("dropped_blank", pipeline.dropped_blank - dropped[0])
+        s.add("dropped_containing", pipeline.dropped_containing - dropped[1])
+
+    with metrics.stage(document, "acronyms") as s:
+        if path_to_acronyms != "":
+            matcher = acronyms.getMatcher(path_to_acronyms)
+            substitutions = matcher.substitutions
+        full_reqs = acronyms.resolveAcronyms(reqs, path_to_acronyms)
+        if path_to_acronyms != "":
+            s.add("substitutions", matcher.substitutions - substitutions)
+
+    with metrics.stage(document, "write") as s:
+        saveRequirements(full_reqs, path_to_doc, profile.get("strip_title", False), output_path, output_dir,
+                         compression)
+        s.add("requirements", len(full_reqs))
+
+    tracker.finish()
+
+    return len(full_reqs)
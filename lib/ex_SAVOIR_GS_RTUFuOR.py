@@ -9,23 +9,36 @@
 
 """
 
-from PyPDF2 import PdfReader
-import re
-
-#___________________________________________________________________________________________________
-def getTextFromPDF(path_to_doc):
-    """ 
-        Extracts the text from a PDF and converts it in string representation.
-    """
-
-    reader = PdfReader(path_to_doc)
-    output = ""
-
-    for i in range(0,len(reader.pages)):
-        page = reader.pages[i]
-        output += page.extract_text()
-
-    return output
+from lib import engine
+
+PROFILE = {
+    "document": "SAVOIR-GS-RTUFuOR-003",
+    "id": r"SAVOIR\.RTU\.[A-Z]+\.[0-9]+",
+    "boilerplate": [
+        ("sub", r"Page\s[0-9]+\/50"),
+        ("sub", r"SAVOIR RTU Functional and Operability Requirements"),
+        ("sub", r"Requirement\sDocument"),
+        ("sub", r"Date 23\/1\/2018"),
+        ("sub", r"Issue 2 Rev 0"),
+        ("sub", r"ESA UNCLASSIFIED – For Official Use"),
+    ],
+    "segments": {"split": r"7\.[0-9]+\s", "skip": 2,
+                 "each": {"split": r"7\.[0-9]+\.[0-9]+\s", "skip": 1,
+                          "each": {"split": r"7\.[0-9]+\.[0-9]+\.[0-9]+\s",
+                                   "each": {"split": r"SAVOIR\.RTU\.[A-Z]+\.[0-9]+\s", "skip": 1}}}},
+    "requirement": [
+        ("cut", r"Note\:\s"),
+        ("cut", r"OptionInfo\:\s"),
+        ("cut", r"OptionInfo\s\:\s"),
+        ("cut", r"Requirement Rationale\:\s"),
+        ("cut", r"Requirement Rationale\s\:\s"),
+        ("sub", r"Requirement Number\s\:"),
+    ],
+    "drop_containing": ["Requirement deleted"],
+    "suffix": "[END]",
+}
+
+PIPELINE = engine.compileProfile(PROFILE)
 
 #___________________________________________________________________________________________________
 def getReqsFromText(text):
@@ -34,98 +47,9 @@ def getReqsFromText(text):
         The function is optimized for the SAVOIR-GS-RTUFuOR-003 document.
     """
 
-    final_req_list = []
-   
-    cleaned_text = re.sub("Page\s[0-9]+\/50", "", text)
-    cleaned_text = re.sub("SAVOIR RTU Functional and Operability Requirements", "", cleaned_text)
-    cleaned_text = re.sub("Requirement\sDocument", "", cleaned_text)
-    cleaned_text = re.sub("Date 23\/1\/2018", "", cleaned_text)
-    cleaned_text = re.sub("Issue 2 Rev 0", "", cleaned_text)
-    cleaned_text = re.sub("ESA UNCLASSIFIED – For Official Use", "", cleaned_text)
-   
-    toplevel_chapter_list = re.split("7\.[0-9]+\s", cleaned_text)
-    del toplevel_chapter_list[:2]
-
-    for tlc in toplevel_chapter_list:
-        midlevel_chapter_list = re.split("7\.[0-9]+\.[0-9]+\s", tlc)
-        del midlevel_chapter_list[:1]
-
-        for mlc in midlevel_chapter_list:
-
-            full_chapter_list = re.split("7\.[0-9]+\.[0-9]+\.[0-9]+\s", mlc)
-        
-            for c in full_chapter_list:
-                reqs = re.split("SAVOIR\.RTU\.[A-Z]+\.[0-9]+\s", c)
-                del reqs[:1]
-
-                for r in reqs:
-                    cleaned_req = re.split("Note\:\s", r)
-                    cleaned_req = re.split("OptionInfo\:\s", cleaned_req[0])
-                    cleaned_req = re.split("OptionInfo\s\:\s", cleaned_req[0])
-                    cleaned_req = re.split("Requirement Rationale\:\s", cleaned_req[0])
-                    cleaned_req = re.split("Requirement Rationale\s\:\s", cleaned_req[0])
-                    
-                    cleaned_req = re.sub("Requirement Number\s\:", "", cleaned_req[0])
-
-                    if not cleaned_req.isspace():
-                        if "Requirement deleted" not in cleaned_req:
-                            final_req_list.append(cleaned_req + "[END]")
-
-    print(str(len(final_req_list)) + " requirements extracted.")
-    return final_req_list
-
-#___________________________________________________________________________________________________
-def resolveAcronyms(req_list, path_to_acronyms):
-    """
-        Load acronyms for specific requirement document from given path.
-        Replace every abbrevation with the full text in the requirements list.
-    
-        Note: if an acronym is not listed in the abbrevation list of the requirements document,
-        than the acronym is not resolved (e.g. RAM).
-    """
-
-    if path_to_acronyms == "":
-        return req_list
-
-    acronyms = open(path_to_acronyms, "r").read()
-    acronym_list = acronyms.split("\n")
-    del acronym_list[-1]
-
-
-    for a in acronym_list:
-        a_list = a.split(",")
-
-        for i, req in enumerate(req_list):
-            if a_list[0] in req:
-                req_list[i] = re.sub(a_list[0], a_list[1], req)
-
-    return req_list
-
-#___________________________________________________________________________________________________
-def saveRequirements(req_list, path_to_doc):
-    """
-        Save the extracted and cleaned requirements in one text document.
-        Therefore, the given path from the input folder is changed to the output folder.
-
-        Note: because of complex formatting issues, requirement statement are not splitted
-        from their comments. This needs to be done manually.
-    """
-
-    output_path = re.sub("input", "output", path_to_doc)
-    output_path = re.sub("pdf", "txt", output_path)
-
-    with open(output_path, "w") as f:
-        for r in req_list:
-            f.write(re.sub("\n","",r))
-            f.write("\n")
-
-        f.close()
+    return engine.getReqsFromText(text, PROFILE)
 
 #___________________________________________________________________________________________________
-def extract(path_to_doc, path_to_acronyms=""):
+def extract(path_to_doc, path_to_acronyms="", **options):
 
-    text = getTextFromPDF(path_to_doc)
-    reqs = getReqsFromText(text)
-    full_reqs = resolveAcronyms(reqs, path_to_acronyms)
-    saveRequirements(full_reqs, path_to_doc)
-    print("Success")
+    return engine.extract(PROFILE, path_to_doc, path_to_acronyms, **options)
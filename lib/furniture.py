@@ -0,0 +1,142 @@
+"""
+    Automatic removal of running headers and footers (page furniture).
+
+    Headers and footers are lines repeated at the top or bottom of most pages of a document,
+    e.g. "Page 12/112", "ESA UNCLASSIFIED – For Official Use" or "©2021embeddedbrainsGmbH 23".
+    Numbers are ignored when lines are compared, so page numbers do not prevent a match.
+
+    The lines are detected on the text of the single pages before the pages are concatenated
+    and removed with one pass over every page. For streaming, the furniture is detected on a
+    window of the first pages only (see iterRemoveFurniture).
+
+"""
+
+import re
+
+NUMBER = re.compile("[0-9]+")
+
+#___________________________________________________________________________________________________
+def getLineKey(line):
+    """
+        Returns the comparison key of a line: stripped, with every number replaced by "#".
+    """
+
+    return NUMBER.sub("#", line.strip())
+
+#___________________________________________________________________________________________________
+def getEdges(lines, depth):
+    """
+        Returns the indices of the first and the last `depth` non-blank lines of a page,
+        both ordered from the edge of the page inwards.
+    """
+
+    filled = [i for i, line in enumerate(lines) if line != "" and not line.isspace()]
+
+    return filled[:depth], filled[::-1][:depth]
+
+#___________________________________________________________________________________________________
+def findFurniture(pages, depth=6, ratio=0.85, minimum=3):
+    """
+        Detects running headers and footers.
+
+        A line is furniture if the same line (see getLineKey) is found at the same position,
+        counted in non-blank lines from the top or the bottom edge, on most pages.
+
+        depth: number of non-blank lines at the top and the bottom of a page searched for furniture
+        ratio: share of the pages a line needs to be repeated on to count as furniture
+        minimum: minimum number of pages a line needs to be repeated on
+
+        Returns the sets of (position, key) of the headers and of the footers.
+    """
+
+    header_count = {}
+    footer_count = {}
+
+    for page in pages:
+        lines = page.split("\n")
+        top, bottom = getEdges(lines, depth)
+
+        for position, i in enumerate(top):
+            key = (position, getLineKey(lines[i]))
+            header_count[key] = header_count.get(key, 0) + 1
+        for position, i in enumerate(bottom):
+            key = (position, getLineKey(lines[i]))
+            footer_count[key] = footer_count.get(key, 0) + 1
+
+    threshold = max(minimum, ratio * len(pages))
+
+    headers = set(key for key, count in header_count.items() if count >= threshold)
+    footers = set(key for key, count in footer_count.items() if count >= threshold)
+
+    return headers, footers
+
+#___________________________________________________________________________________________________
+def getEdgeFurniture(lines, edge, furniture):
+    """
+        Returns the indices of the furniture lines at one edge of a page. The search stops at
+        the first line that is no furniture, so the body of a page is never touched.
+    """
+
+    found = []
+
+    for position, i in enumerate(edge):
+        if (position, getLineKey(lines[i])) not in furniture:
+            break
+        found.append(i)
+
+    return found
+
+#___________________________________________________________________________________________________
+def cleanPage(page, headers, footers, depth=6):
+    """
+        Removes the given headers and footers from one page.
+    """
+
+    lines = page.split("\n")
+    top, bottom = getEdges(lines, depth)
+
+    furniture = set(getEdgeFurniture(lines, top, headers))
+    furniture.update(getEdgeFurniture(lines, bottom, footers))
+
+    if len(furniture) == 0:
+        return page
+
+    return "\n".join(line for i, line in enumerate(lines) if i not in furniture)
+
+#___________________________________________________________________________________________________
+def removeFurniture(pages, depth=6, ratio=0.85, minimum=3):
+    """
+        Removes the running headers and footers from every page.
+        Returns the list of cleaned pages.
+    """
+
+    headers, footers = findFurniture(pages, depth, ratio, minimum)
+
+    if len(headers) == 0 and len(footers) == 0:
+        return list(pages)
+
+    return [cleanPage(page, headers, footers, depth) for page in pages]
+
+#___________________________________________________________________________________________________
+def iterRemoveFurniture(pages, window=32, depth=6, ratio=0.85, minimum=3):
+    """
+        Generator version of removeFurniture for page streams. The furniture is detected on the
+        first `window` pages and removed from all pages, so at most `window` pages are held.
+    """
+
+    pages = iter(pages)
+    head = []
+
+    for page in pages:
+        head.append(page)
+        if len(head) >= window:
+            break
+
+    headers, footers = findFurniture(head, depth, ratio, minimum)
+
+    for page in head:
+        yield cleanPage(page, headers, footers, depth)
+    del head[:]
+
+    for page in pages:
+        yield cleanPage(page, headers, footers, depth)
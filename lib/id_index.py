@@ -0,0 +1,200 @@
+"""
+    Persistent index of the requirement identifiers of the corpus.
+
+    The index maps every requirement ID (see the "id" pattern of the profiles) to the document,
+    the byte offset and the line (ordinal) of the requirement in the output file of the
+    document, and to its number in the corpus file (see corpus.py). It is an open addressing
+    hash table stored in a file and read with mmap, so a lookup costs O(1) independent of the
+    size of the corpus. IDs are compared in normalized form (engine.normalizeId).
+
+    FILE LAYOUT (little endian):
+    header          magic "SRQI", version, number of slots, number of IDs, offset and length of
+                    the string table (HEADER)
+    slots           hash table with linear probing (SLOT): 64 bit hash of the ID (0 = empty),
+                    offset and length of the ID in the key area, document (index in the string
+                    table), byte offset in the output file, ordinal, corpus record number
+    keys            the IDs, UTF-8
+    string table    JSON list of the document names
+
+    An ID found several times (e.g. cross references segmented as requirements) has several
+    entries, lookup returns all of them.
+
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+
+from lib import engine
+
+MAGIC = b"SRQI"
+VERSION = 1
+HEADER = struct.Struct("<4sIQQQQ")
+SLOT = struct.Struct("<QQIIQII")
+
+#___________________________________________________________________________________________________
+def getHash(req_id):
+    """
+        Returns the 64 bit hash of a normalized ID, never 0 (0 marks empty slots).
+    """
+
+    value = int.from_bytes(hashlib.blake2b(req_id.encode("utf-8"), digest_size=8).digest(), "little")
+
+    return value or 1
+
+#___________________________________________________________________________________________________
+def writeIdIndex(path, records):
+    """
+        Writes the ID index of records in corpus order (see engine.getRecords).
+        Records without ID are skipped. Returns the number of indexed IDs.
+    """
+
+    documents = {}
+    entries = []
+    offsets = {}
+
+    for number, record in enumerate(records):
+        # byte offset of the line in the output file of the document
+        offset = offsets.get(record["document"], 0)
+        offsets[record["document"]] = offset + len(record["text"].encode("utf-8")) + 1
+
+        if record["id"] == "":
+            continue
+
+        document = documents.setdefault(record["document"], len(documents))
+        entries.append((engine.normalizeId(record["id"]), document, offset, record["ordinal"], number))
+
+    slot_count = 8
+    while slot_count < 2 * len(entries):
+        slot_count *= 2
+
+    slots = [None] * slot_count
+    keys = []
+    key_offset = HEADER.size + slot_count * SLOT.size
+
+    for req_id, document, offset, ordinal, number in entries:
+        data = req_id.encode("utf-8")
+        value = getHash(req_id)
+        i = value & (slot_count - 1)
+
+        while slots[i] is not None:
+            i = (i + 1) & (slot_count - 1)
+
+        slots[i] = SLOT.pack(value, key_offset, len(data), document, offset, ordinal, number)
+        keys.append(data)
+        key_offset += len(data)
+
+    empty = SLOT.pack(0, 0, 0, 0, 0, 0, 0)
+    string_table = json.dumps(list(documents)).encode("utf-8")
+
+    with open(path + ".tmp", "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, slot_count, len(entries), key_offset, len(string_table)))
+        f.write(b"".join(empty if slot is None else slot for slot in slots))
+        f.write(b"".join(keys))
+        f.write(string_table)
+
+    os.replace(path + ".tmp", path)
+
+    return len(entries)
+
+#___________________________________________________________________________________________________
+class IdIndex:
+    """
+        Memory-mapped read access to an ID index file.
+    """
+
+    def __init__(self, path):
+
+        self.file = open(path, "rb")
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, self.slot_count, self.count, strings_offset, strings_length = \
+            HEADER.unpack_from(self.map, 0)
+
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(path + " is no ID index of version " + str(VERSION))
+
+        self.documents = json.loads(self.map[strings_offset:strings_offset + strings_length].decode("utf-8"))
+
+    def __len__(self):
+
+        return self.count
+
+    def lookup(self, req_id):
+        """
+            Returns all locations of an ID as list of dictionaries with the keys
+            "id", "document", "offset", "ordinal" and "record".
+        """
+
+        req_id = engine.normalizeId(req_id)
+        data = req_id.encode("utf-8")
+        value = getHash(req_id)
+        i = value & (self.slot_count - 1)
+        found = []
+
+        while True:
+            slot_hash, key_offset, key_length, document, offset, ordinal, number = \
+                SLOT.unpack_from(self.map, HEADER.size + i * SLOT.size)
+
+            if slot_hash == 0:
+                return found
+
+            if slot_hash == value and self.map[key_offset:key_offset + key_length] == data:
+                found.append({"id": req_id, "document": self.documents[document], "offset": offset,
+                              "ordinal": ordinal, "record": number})
+
+            i = (i + 1) & (self.slot_count - 1)
+
+    def close(self):
+
+        self.map.close()
+        self.file.close()
+
+    def __enter__(self):
+
+        return self
+
+    def __exit__(self, kind, value, trace):
+
+        self.close()
+        return False
+
+#___________________________________________________________________________________________________
+def main(argv):
+    """
+        Command line of the ID lookup, see main.py.
+    """
+
+    import argparse
+
+    from lib import corpus
+
+    parser = argparse.ArgumentParser(prog="main.py lookup", description="Find requirements by their ID.")
+    parser.add_argument("ids", nargs="+", help="requirement IDs, e.g. SAVOIR.MMS.GEN.0100")
+    parser.add_argument("--index", default="output/corpus.idx", help="ID index (default: output/corpus.idx)")
+    parser.add_argument("--corpus", default="output/corpus.srq", help="corpus file for the texts (default: output/corpus.srq)")
+    args = parser.parse_args(argv)
+
+    reader = corpus.CorpusReader(args.corpus) if os.path.isfile(args.corpus) else None
+    missing = 0
+
+    with IdIndex(args.index) as index:
+        for req_id in args.ids:
+            locations = index.lookup(req_id)
+            if len(locations) == 0:
+                print(req_id + ": not found")
+                missing += 1
+
+            for location in locations:
+                print(location["id"] + ": " + location["document"] + ", line " + str(location["ordinal"] + 1)
+                      + ", byte " + str(location["offset"]))
+                if reader is not None:
+                    print("    " + reader.getText(location["record"]))
+
+    if reader is not None:
+        reader.close()
+
+    return 1 if missing > 0 else 0
@@ -0,0 +1,182 @@
+"""
+    Stage timing and counters of the extraction.
+
+    Every stage of an extraction (see engine.extract) reports one event with its wall time,
+    CPU time and counters, e.g. pages, bytes of text or dropped requirements:
+    {"event": "stage", "document": "RTEMS_ICD", "stage": "segment", "wall": 0.002, "cpu": 0.002,
+     "counters": {"requirements": 93, "dropped_blank": 1, "dropped_containing": 0}}
+
+    The events are written as JSON lines to a file ("-" for stderr) and/or passed to callbacks.
+    Without a file and without callbacks the instrumentation is disabled: stage() returns a
+    shared object that does nothing, so the cost is one function call per stage.
+
+    CONFIGURATION:
+    SPACEREQEX_METRICS      file the JSON lines are appended to, or "-" for stderr (default: off)
+
+"""
+
+import json
+import os
+import sys
+import time
+
+_path = os.environ.get("SPACEREQEX_METRICS", "")
+_callbacks = []
+
+#___________________________________________________________________________________________________
+def configure(path=None, callback=None):
+    """
+        Sets the JSON lines file ("-" for stderr, "" to disable) and/or adds a callback
+        that is called with every event dictionary.
+    """
+
+    global _path
+
+    if path is not None:
+        _path = path
+        # worker processes of the batch read the file from the environment
+        os.environ["SPACEREQEX_METRICS"] = path
+
+    if callback is not None:
+        _callbacks.append(callback)
+
+#___________________________________________________________________________________________________
+def removeCallback(callback):
+
+    _callbacks.remove(callback)
+
+#___________________________________________________________________________________________________
+def isEnabled():
+
+    return _path != "" or len(_callbacks) > 0
+
+#___________________________________________________________________________________________________
+def emit(event):
+    """
+        Passes one event to the callbacks and appends it to the JSON lines file.
+    """
+
+    for callback in _callbacks:
+        callback(event)
+
+    if _path == "":
+        return
+
+    line = json.dumps(event) + "\n"
+
+    if _path == "-":
+        sys.stderr.write(line)
+    else:
+        # one write per line, so lines of several processes are not interleaved
+        with open(_path, "a") as f:
+            f.write(line)
+
+#___________________________________________________________________________________________________
+class Stage:
+    """
+        Measures one stage of the extraction of a document. Used as context manager, the
+        event is emitted when the stage is left.
+    """
+
+    def __init__(self, document, name):
+
+        self.document = document
+        self.name = name
+        self.counters = {}
+
+    def add(self, counter, value=1):
+
+        self.counters[counter] = self.counters.get(counter, 0) + value
+
+    def __enter__(self):
+
+        self.wall = time.perf_counter()
+        self.cpu = time.process_time()
+        return self
+
+    def __exit__(self, kind, value, trace):
+
+        emit({
+            "event": "stage",
+            "document": self.document,
+            "stage": self.name,
+            "wall": time.perf_counter() - self.wall,
+            "cpu": time.process_time() - self.cpu,
+            "counters": self.counters,
+            "failed": kind is not None,
+        })
+
+        return False
+
+#___________________________________________________________________________________________________
+class NullStage:
+    """
+        Stage used while the instrumentation is disabled.
+    """
+
+    def add(self, counter, value=1):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, kind, value, trace):
+        return False
+
+NULL_STAGE = NullStage()
+
+#___________________________________________________________________________________________________
+def stage(document, name):
+    """
+        Returns the context manager measuring one stage, e.g.
+
+        with metrics.stage("RTEMS_ICD", "segment") as s:
+            ...
+            s.add("requirements", len(reqs))
+    """
+
+    if _path == "" and len(_callbacks) == 0:
+        return NULL_STAGE
+
+    return Stage(document, name)
+
+#___________________________________________________________________________________________________
+def summarize(path):
+    """
+        Sums the wall and CPU time of every (document, stage) in a JSON lines file.
+        Returns a list of (document, stage, wall, cpu), the slowest stage first.
+    """
+
+    totals = {}
+
+    with open(path, "r") as f:
+        for line in f:
+            event = json.loads(line)
+            if event.get("event") != "stage":
+                continue
+
+            key = (event["document"], event["stage"])
+            wall, cpu = totals.get(key, (0.0, 0.0))
+            totals[key] = (wall + event["wall"], cpu + event["cpu"])
+
+    rows = [(document, name, wall, cpu) for (document, name), (wall, cpu) in totals.items()]
+
+    return sorted(rows, key=lambda row: -row[2])
+
+#___________________________________________________________________________________________________
+def main(argv):
+    """
+        Command line of the metrics summary, see main.py.
+    """
+
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="main.py metrics", description="Summarize a metrics file.")
+    parser.add_argument("path", help="JSON lines file written with --metrics")
+    parser.add_argument("--top", type=int, default=20, help="number of stages shown (default: 20)")
+    args = parser.parse_args(argv)
+
+    for document, name, wall, cpu in summarize(args.path)[:args.top]:
+        print("%-24s %-9s wall %8.3f s  cpu %8.3f s" % (document, name, wall, cpu))
+
+    return 0
@@ -0,0 +1,210 @@
+"""
+    Persistent on-disk cache for the text of single PDF pages.
+
+    Decoding the PDFs with PyPDF2 is the slowest stage of every extraction, although the
+    documents in the input folder almost never change between two runs. The cache stores the
+    zlib compressed text of every page in a local SQLite database.
+
+    CACHE KEY:
+    (SHA-256 of the PDF content, version of the text backend, page index)
+
+    The cache has a size cap. If the stored pages exceed the cap, the least recently used
+    pages are evicted first.
+
+"""
+
+import hashlib
+import os
+import time
+import zlib
+
+#___________________________________________________________________________________________________
+def hashFile(path, chunk_size=1 << 20):
+    """
+        Calculates the SHA-256 hex digest of the content of a file.
+    """
+
+    digest = hashlib.sha256()
+
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+#___________________________________________________________________________________________________
+class PageCache:
+    """
+        SQLite store for compressed page texts with hit/miss counters and LRU eviction.
+
+        The counters count pages: every page served from the cache is a hit, every page
+        that needs to be decoded from the PDF is a miss.
+    """
+
+    def __init__(self, path, max_bytes=256 * 1024 * 1024):
+
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        directory = os.path.dirname(path)
+        if directory != "":
+            os.makedirs(directory, exist_ok=True)
+
+        import sqlite3
+
+        # several batch workers may use the same cache file at the same time
+        self.connection = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS documents ("
+            " pdf_hash TEXT, backend TEXT, page_count INTEGER,"
+            " PRIMARY KEY (pdf_hash, backend))")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            " pdf_hash TEXT, backend TEXT, page INTEGER, data BLOB, size INTEGER, last_used REAL,"
+            " PRIMARY KEY (pdf_hash, backend, page))")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS pages_lru ON pages (last_used)")
+
+    #_______________________________________________________________________________________________
+    def getPageCount(self, pdf_hash, backend):
+        """
+            Returns the known number of pages of a document or None if the document is unknown.
+        """
+
+        row = self.connection.execute(
+            "SELECT page_count FROM documents WHERE pdf_hash = ? AND backend = ?",
+            (pdf_hash, backend)).fetchone()
+
+        return None if row is None else row[0]
+
+    #_______________________________________________________________________________________________
+    def getPage(self, pdf_hash, backend, page):
+        """
+            Returns the text of a single page or None if the page is not in the cache.
+        """
+
+        row = self.connection.execute(
+            "SELECT data FROM pages WHERE pdf_hash = ? AND backend = ? AND page = ?",
+            (pdf_hash, backend, page)).fetchone()
+
+        if row is None:
+            self.misses += 1
+            return None
+
+        self.connection.execute(
+            "UPDATE pages SET last_used = ? WHERE pdf_hash = ? AND backend = ? AND page = ?",
+            (time.time(), pdf_hash, backend, page))
+        self.hits += 1
+
+        return zlib.decompress(row[0]).decode("utf-8")
+
+    #_______________________________________________________________________________________________
+    def getPages(self, pdf_hash, backend, page_count):
+        """
+            Returns a list with the text of every page of a document.
+            Pages missing in the cache are None in the list.
+        """
+
+        pages = [None] * page_count
+        rows = self.connection.execute(
+            "SELECT page, data FROM pages WHERE pdf_hash = ? AND backend = ?",
+            (pdf_hash, backend)).fetchall()
+
+        for page, data in rows:
+            if page < page_count:
+                pages[page] = zlib.decompress(data).decode("utf-8")
+
+        found = [page for page, _ in rows if page < page_count]
+        if len(found) > 0:
+            self.connection.executemany(
+                "UPDATE pages SET last_used = ? WHERE pdf_hash = ? AND backend = ? AND page = ?",
+                [(time.time(), pdf_hash, backend, page) for page in found])
+
+        hits = len(found)
+        self.hits += hits
+        self.misses += page_count - hits
+
+        return pages
+
+    #_______________________________________________________________________________________________
+    def putPages(self, pdf_hash, backend, page_count, pages):
+        """
+            Stores decoded pages of a document. pages maps the page index to the page text.
+        """
+
+        now = time.time()
+        rows = []
+
+        for page, text in pages.items():
+            data = zlib.compress(text.encode("utf-8"))
+            rows.append((pdf_hash, backend, page, data, len(data), now))
+
+        self.connection.execute("BEGIN IMMEDIATE")
+        try:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO documents VALUES (?, ?, ?)",
+                (pdf_hash, backend, page_count))
+            self.connection.executemany("INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?)", rows)
+            self.connection.execute("COMMIT")
+        except BaseException:
+            self.connection.execute("ROLLBACK")
+            raise
+
+        self.evict()
+
+    #_______________________________________________________________________________________________
+    def size(self):
+        """
+            Returns the number of compressed bytes stored in the cache.
+        """
+
+        return self.connection.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+
+    #_______________________________________________________________________________________________
+    def evict(self):
+        """
+            Removes the least recently used pages until the cache fits into max_bytes.
+        """
+
+        excess = self.size() - self.max_bytes
+        if excess <= 0:
+            return
+
+        victims = []
+        for pdf_hash, backend, page, size in self.connection.execute(
+                "SELECT pdf_hash, backend, page, size FROM pages ORDER BY last_used"):
+            victims.append((pdf_hash, backend, page))
+            excess -= size
+            if excess <= 0:
+                break
+
+        self.connection.executemany(
+            "DELETE FROM pages WHERE pdf_hash = ? AND backend = ? AND page = ?", victims)
+        self.evictions += len(victims)
+
+    #_______________________________________________________________________________________________
+    def clear(self):
+        """
+            Removes every document from the cache.
+        """
+
+        self.connection.execute("DELETE FROM pages")
+        self.connection.execute("DELETE FROM documents")
+
+    #_______________________________________________________________________________________________
+    def stats(self):
+        """
+            Returns the counters of the cache as dictionary.
+        """
+
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                "bytes": self.size(), "max_bytes": self.max_bytes}
+
+    #_______________________________________________________________________________________________
+    def close(self):
+
+        self.connection.close()
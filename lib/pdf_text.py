@@ -0,0 +1,324 @@
+"""
+    Shared text stage of all extractors: converts a PDF in string representation.
+
+    Decoded pages are kept in a persistent page cache (see page_cache.py), so a warm re-run
+    of an unchanged document does not parse the PDF at all.
+
+    CONFIGURATION:
+    SPACEREQEX_CACHE        path of the cache database or "off" (default: .cache/pages.sqlite)
+    SPACEREQEX_CACHE_SIZE   size cap of the cache in bytes (default: 256 MB)
+    SPACEREQEX_WORKERS      number of processes decoding pages in parallel (default: 1)
+    SPACEREQEX_BACKEND      text backend, see backends.py (default: pypdf2)
+
+    With more than one worker, the page range is split in contiguous chunks. Every worker
+    opens the document itself and the pages are stitched back in document order, so the
+    output is identical to the serial path.
+
+    Profiles can restrict the decoded pages to the chapters holding requirements, found by the
+    bookmarks of the PDF (see getChapterPages). A PDF without bookmarks is decoded completely:
+    scanning the raw content streams of the pages for requirement ID prefixes instead is not
+    reliable, the text is split into kerned TJ fragments.
+
+    The text of the pages is joined into one string. The page boundaries are kept as a table
+    of cumulative page lengths (getPageOffsets), a position in the joined text is mapped back
+    to its page by binary search (getPageIndex).
+
+"""
+
+import bisect
+import os
+import re
+from array import array
+from itertools import accumulate
+
+from lib import backends, progress
+from lib.page_cache import PageCache, hashFile
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                  ".cache", "pages.sqlite")
+
+cache_path = os.environ.get("SPACEREQEX_CACHE", DEFAULT_CACHE_PATH)
+cache_size = int(os.environ.get("SPACEREQEX_CACHE_SIZE", 256 * 1024 * 1024))
+workers = int(os.environ.get("SPACEREQEX_WORKERS", 1))
+backend_name = os.environ.get("SPACEREQEX_BACKEND", "pypdf2")
+
+_cache = None
+
+#___________________________________________________________________________________________________
+def configure(cache=None, size=None, processes=None, backend=None):
+    """
+        Changes the settings of the text stage. Use cache="off" to disable the cache.
+    """
+
+    global cache_path, cache_size, workers, backend_name, _cache
+
+    if processes is not None:
+        workers = max(1, processes)
+    if backend is not None:
+        backends.getBackend(backend)
+        backend_name = backend
+
+    if cache is not None:
+        cache_path = cache
+    if size is not None:
+        cache_size = size
+
+    if _cache is not None:
+        _cache.close()
+        _cache = None
+
+#___________________________________________________________________________________________________
+def getCache():
+    """
+        Returns the page cache of this process or None if the cache is disabled.
+    """
+
+    global _cache
+
+    if cache_path in ("", "off", None) or not getBackend().cacheable:
+        return None
+
+    if _cache is None:
+        _cache = PageCache(cache_path, cache_size)
+
+    return _cache
+
+#___________________________________________________________________________________________________
+def getBackend():
+    """
+        Returns the configured text backend.
+    """
+
+    return backends.getBackend(backend_name)
+
+#___________________________________________________________________________________________________
+def getBackendVersion():
+    """
+        Returns the name and version of the PDF decoder, which is part of the cache key.
+    """
+
+    return getBackend().getVersion()
+
+#___________________________________________________________________________________________________
+def decodeChunk(path_to_doc, page_numbers, name):
+    """
+        Decodes the text of the given pages with a document opened by the worker itself.
+        Runs in the worker processes of decodePages.
+    """
+
+    _, getText = backends.getBackend(name).open(path_to_doc)
+
+    return [getText(i) for i in page_numbers]
+
+#___________________________________________________________________________________________________
+def decodePages(path_to_doc, page_numbers=None, tracker=progress.NULL_TRACKER):
+    """
+        Decodes the text of the given pages (default: all pages) with the text backend.
+        Returns the number of pages of the document and a dictionary page index -> text.
+        Every decoded page is counted on the progress tracker.
+    """
+
+    page_count, getText = getBackend().open(path_to_doc)
+
+    if page_numbers is None:
+        page_numbers = range(0, page_count)
+    page_numbers = list(page_numbers)
+    tracker.expect(len(page_numbers))
+
+    pages = {}
+
+    if workers <= 1 or len(page_numbers) < 2:
+        for i in page_numbers:
+            pages[i] = getText(i)
+            tracker.page()
+        return page_count, pages
+
+    processes = min(workers, len(page_numbers))
+    chunk_size = -(-len(page_numbers) // processes)
+    chunks = [page_numbers[i:i + chunk_size] for i in range(0, len(page_numbers), chunk_size)]
+
+    # imported here, the process pool is only needed for large documents with SPACEREQEX_WORKERS
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        results = executor.map(decodeChunk, [path_to_doc] * len(chunks), chunks, [backend_name] * len(chunks))
+
+        for chunk, texts in zip(chunks, results):
+            pages.update(zip(chunk, texts))
+            tracker.page(len(chunk))
+
+    return page_count, pages
+
+#___________________________________________________________________________________________________
+def getOutline(path_to_doc):
+    """
+        Returns the bookmarks of a PDF as list of (level, title, page index) in document order
+        and the number of pages. No page is decoded.
+    """
+
+    from PyPDF2 import PdfReader
+
+    reader = PdfReader(path_to_doc)
+    outline = []
+
+    def visit(items, level):
+
+        for item in items:
+            if isinstance(item, list):
+                visit(item, level + 1)
+                continue
+
+            page = reader.get_destination_page_number(item)
+            if page is not None:
+                outline.append((level, item.title, page))
+
+    visit(reader.outline, 0)
+
+    return outline, len(reader.pages)
+
+#___________________________________________________________________________________________________
+def getChapterPages(path_to_doc, pattern):
+    """
+        Returns the sorted indices of the pages of all top level chapters whose bookmark title
+        matches the regular expression pattern. A chapter ends on the page on which the next
+        chapter starts. Returns None if the PDF has no bookmarks or no chapter matches.
+    """
+
+    outline, page_count = getOutline(path_to_doc)
+    chapters = sorted((page, title) for level, title, page in outline if level == 0)
+    regex = re.compile(pattern)
+    page_numbers = set()
+
+    for i, (start, title) in enumerate(chapters):
+        if regex.match(title) is None:
+            continue
+
+        end = chapters[i + 1][0] + 1 if i + 1 < len(chapters) else page_count
+        page_numbers.update(range(start, min(max(end, start + 1), page_count)))
+
+    if len(page_numbers) == 0:
+        return None
+
+    return sorted(page_numbers)
+
+#___________________________________________________________________________________________________
+def getPagesFromPDF(path_to_doc, page_numbers=None, tracker=progress.NULL_TRACKER):
+    """
+        Returns the text of every page of a PDF (or of the given pages only) as list.
+        Pages are served from the page cache and only missing pages are decoded.
+        Every page is counted on the progress tracker.
+    """
+
+    cache = getCache()
+
+    if cache is None:
+        page_count, pages = decodePages(path_to_doc, page_numbers, tracker)
+        return [pages[i] for i in (range(0, page_count) if page_numbers is None else page_numbers)]
+
+    pdf_hash = hashFile(path_to_doc)
+    backend = getBackendVersion()
+    page_count = cache.getPageCount(pdf_hash, backend)
+
+    if page_count is None:
+        page_count, pages = decodePages(path_to_doc, page_numbers, tracker)
+        cache.misses += len(pages)
+        cache.putPages(pdf_hash, backend, page_count, pages)
+        return [pages[i] for i in (range(0, page_count) if page_numbers is None else page_numbers)]
+
+    if page_numbers is None:
+        output = cache.getPages(pdf_hash, backend, page_count)
+    else:
+        output = [cache.getPage(pdf_hash, backend, i) for i in page_numbers]
+
+    indices = range(0, page_count) if page_numbers is None else page_numbers
+    missing = [i for i, page in zip(indices, output) if page is None]
+    tracker.expect(len(output) - len(missing))
+    tracker.page(len(output) - len(missing))
+
+    if len(missing) > 0:
+        _, pages = decodePages(path_to_doc, missing, tracker)
+        cache.putPages(pdf_hash, backend, page_count, pages)
+        output = [pages[i] if page is None else page for i, page in zip(indices, output)]
+
+    return output
+
+#___________________________________________________________________________________________________
+def iterPagesFromPDF(path_to_doc, batch_size=16, page_numbers=None, tracker=progress.NULL_TRACKER):
+    """
+        Generator over the text of the pages of a PDF (or of the given pages only). Pages are
+        read lazily one after another, from the page cache if possible. Decoded pages are
+        stored in the cache in batches. Every page is counted on the progress tracker.
+    """
+
+    cache = getCache()
+    getText = None
+
+    if cache is None:
+        page_count, getText = getBackend().open(path_to_doc)
+        indices = range(0, page_count) if page_numbers is None else page_numbers
+        tracker.expect(len(indices))
+        for i in indices:
+            text = getText(i)
+            tracker.page()
+            yield text
+        return
+
+    pdf_hash = hashFile(path_to_doc)
+    backend = getBackendVersion()
+    page_count = cache.getPageCount(pdf_hash, backend)
+    known = page_count is not None
+
+    if not known:
+        page_count, getText = getBackend().open(path_to_doc)
+
+    decoded = {}
+    indices = range(0, page_count) if page_numbers is None else page_numbers
+    tracker.expect(len(indices))
+
+    for i in indices:
+        text = cache.getPage(pdf_hash, backend, i) if known else None
+
+        if text is None:
+            if getText is None:
+                _, getText = getBackend().open(path_to_doc)
+            text = getText(i)
+            decoded[i] = text
+
+            if not known:
+                cache.misses += 1
+            if len(decoded) >= batch_size:
+                cache.putPages(pdf_hash, backend, page_count, decoded)
+                decoded = {}
+
+        tracker.page()
+        yield text
+
+    if len(decoded) > 0:
+        cache.putPages(pdf_hash, backend, page_count, decoded)
+
+#___________________________________________________________________________________________________
+def getPageOffsets(pages):
+    """
+        Returns the end offsets of the pages in their joined text ("".join(pages)), as array of
+        64 bit integers.
+    """
+
+    return array("q", accumulate(map(len, pages)))
+
+#___________________________________________________________________________________________________
+def getPageIndex(page_offsets, position):
+    """
+        Returns the index of the page holding a position of the joined text (see
+        getPageOffsets). Positions at or behind the end of the text belong to the last page,
+        without pages every position belongs to page 0.
+    """
+
+    return min(bisect.bisect_right(page_offsets, position), max(len(page_offsets) - 1, 0))
+
+#___________________________________________________________________________________________________
+def getTextFromPDF(path_to_doc):
+    """
+        Extracts the text from a PDF and converts it in string representation.
+    """
+
+    return "".join(getPagesFromPDF(path_to_doc))
@@ -0,0 +1,224 @@
+"""
+    Progress of running extractions: pages decoded and requirements emitted per document.
+
+    While a document is extracted (see engine.extract), its tracker emits progress events with
+    the throughput and the estimated remaining time:
+    {"event": "progress", "document": "RTEMS_ICD", "pages": 120, "total_pages": 300,
+     "requirements": 0, "elapsed": 4.1, "pages_per_second": 29.3, "eta": 6.2, "done": false}
+
+    Events are passed to callbacks, at most one per `interval` seconds and document, plus one
+    when the document is done. Without callbacks the tracking is disabled: track() returns a
+    shared object that does nothing, like metrics.stage.
+
+    Display renders the events of one or more documents (e.g. the parallel workers of the
+    batch, see batch.runBatch) as one status line on a terminal:
+
+    from lib import ex_RTEMS_ICD, progress
+    progress.configure(callback=progress.Display())
+    ex_RTEMS_ICD.extract("input/RTEMS_ICD.pdf")
+
+"""
+
+import shutil
+import sys
+import time
+
+_callbacks = []
+
+#___________________________________________________________________________________________________
+def configure(callback):
+    """
+        Adds a callback that is called with every progress event.
+    """
+
+    _callbacks.append(callback)
+
+#___________________________________________________________________________________________________
+def removeCallback(callback):
+
+    _callbacks.remove(callback)
+
+#___________________________________________________________________________________________________
+def isEnabled():
+
+    return len(_callbacks) > 0
+
+#___________________________________________________________________________________________________
+def emit(event):
+
+    for callback in _callbacks:
+        callback(event)
+
+#___________________________________________________________________________________________________
+class Tracker:
+    """
+        Progress of the extraction of one document.
+    """
+
+    def __init__(self, document, interval=0.25):
+
+        self.document = document
+        self.interval = interval
+        self.pages = 0
+        self.total_pages = 0
+        self.requirements = 0
+        self.start = time.perf_counter()
+        self.emitted = 0.0
+
+    def expect(self, pages):
+        """
+            Adds pages to the number of pages that will be decoded.
+        """
+
+        self.total_pages += pages
+
+    def page(self, count=1):
+
+        self.pages += count
+        self.update()
+
+    def requirement(self, count=1):
+
+        self.requirements += count
+        self.update()
+
+    def update(self, done=False):
+
+        now = time.perf_counter()
+        if not done and now - self.emitted < self.interval:
+            return
+
+        self.emitted = now
+        elapsed = now - self.start
+        rate = self.pages / elapsed if elapsed > 0 else 0.0
+        remaining = max(self.total_pages - self.pages, 0)
+
+        emit({
+            "event": "progress",
+            "document": self.document,
+            "pages": self.pages,
+            "total_pages": self.total_pages,
+            "requirements": self.requirements,
+            "elapsed": elapsed,
+            "pages_per_second": rate,
+            "eta": 0.0 if done or remaining == 0 else (remaining / rate if rate > 0 else None),
+            "done": done,
+        })
+
+    def finish(self):
+
+        self.update(done=True)
+
+#___________________________________________________________________________________________________
+class NullTracker:
+    """
+        Tracker used while the tracking is disabled.
+    """
+
+    def expect(self, pages):
+        pass
+
+    def page(self, count=1):
+        pass
+
+    def requirement(self, count=1):
+        pass
+
+    def finish(self):
+        pass
+
+NULL_TRACKER = NullTracker()
+
+#___________________________________________________________________________________________________
+def track(document, interval=0.25):
+    """
+        Returns the tracker of the extraction of one document.
+    """
+
+    if len(_callbacks) == 0:
+        return NULL_TRACKER
+
+    return Tracker(document, interval)
+
+#___________________________________________________________________________________________________
+def formatSeconds(seconds):
+
+    if seconds is None:
+        return "?"
+
+    minutes, seconds = divmod(int(round(seconds)), 60)
+
+    return "%d:%02d" % (minutes, seconds) if minutes > 0 else str(seconds) + " s"
+
+#___________________________________________________________________________________________________
+class Display:
+    """
+        Renders progress events as one status line: the finished documents and, for every
+        running document, pages, throughput and ETA. On a terminal the line is redrawn in place
+        at most every `interval` seconds, else it is printed as a new line every 10 seconds.
+        Events are grouped by their "key" (set by the batch) or their document.
+    """
+
+    def __init__(self, documents=None, stream=None, interval=0.2):
+
+        self.stream = sys.stderr if stream is None else stream
+        self.terminal = self.stream.isatty()
+        self.interval = interval if self.terminal else 10.0
+        self.documents = documents
+        self.running = {}
+        self.finished = set()
+        self.rendered = 0.0
+        self.visible = False
+
+    def __call__(self, event):
+
+        key = event.get("key", event.get("document"))
+
+        if event.get("done"):
+            self.running.pop(key, None)
+            self.finished.add(key)
+        else:
+            self.running[key] = event
+
+        now = time.perf_counter()
+        if now - self.rendered >= self.interval:
+            self.rendered = now
+            self.render()
+
+    def getLine(self):
+
+        total = "" if self.documents is None else "/" + str(self.documents)
+        parts = [str(len(self.finished)) + total + " documents"]
+
+        for key, event in self.running.items():
+            pages = str(event["pages"])
+            if event["total_pages"] > 0:
+                pages += "/" + str(event["total_pages"])
+            parts.append("%s %s pages %.1f/s ETA %s %d req" % (
+                key, pages, event["pages_per_second"], formatSeconds(event["eta"]), event["requirements"]))
+
+        return " | ".join(parts)
+
+    def render(self):
+
+        line = self.getLine()
+
+        if self.terminal:
+            # a wrapped line could not be redrawn in place
+            width = shutil.get_terminal_size().columns - 1
+            self.stream.write("\r" + line[:width] + "\x1b[K")
+            self.visible = True
+        else:
+            self.stream.write(line + "\n")
+
+        self.stream.flush()
+
+    def clear(self):
+        """
+            Removes the status line, e.g. before other output is printed.
+        """
+
+        if self.visible:
+            self.stream.write("\r\x1b[K")
+            self.stream.flush()
+            self.visible = False
@@ -0,0 +1,169 @@
+"""
+    Incremental rebuild of the corpus.
+
+    The build manifest records for every output file the content hashes of everything the
+    output depends on:
+        - the PDF and the acronym file of the document
+        - the source of the ex_*.py module and of the shared engine modules
+        - the name and version of the text backend (see pdf_text.getBackendVersion)
+    A document is stale if one of the hashes changed, if it was never built or if its output
+    file is missing or was changed since. Only stale documents are extracted again.
+
+    To avoid hashing unchanged PDFs on every run, the manifest also keeps the size and the
+    modification time of every hashed file; the hash is only recalculated if they differ.
+
+    MANIFEST FORMAT (JSON):
+    {"outputs": {output path: {"pdf": hash, "acronyms": hash, "source": hash, "backend": version,
+                               "output": hash}},
+     "files": {path: [size, mtime_ns, hash]}}
+
+"""
+
+import hashlib
+import json
+import os
+
+from lib import pdf_text, registry, writer
+from lib.page_cache import hashFile
+
+LIB_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_MANIFEST_PATH = os.path.join(os.path.dirname(LIB_DIR), ".cache", "build.json")
+
+# modules of the lib every extractor depends on
+ENGINE_MODULES = ("engine.py", "acronyms.py", "furniture.py", "stream.py", "pdf_text.py", "backends.py", "writer.py")
+
+#___________________________________________________________________________________________________
+def loadManifest(path=DEFAULT_MANIFEST_PATH):
+    """
+        Loads the build manifest, an empty manifest if there is none.
+    """
+
+    if not os.path.isfile(path):
+        return {"outputs": {}, "files": {}}
+
+    with open(path, "r") as f:
+        return json.load(f)
+
+#___________________________________________________________________________________________________
+def saveManifest(manifest, path=DEFAULT_MANIFEST_PATH):
+    """
+        Saves the build manifest. The file is replaced atomically, so an interrupted run
+        never leaves a corrupt manifest.
+    """
+
+    directory = os.path.dirname(path)
+    if directory != "":
+        os.makedirs(directory, exist_ok=True)
+
+    with open(path + ".tmp", "w") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(path + ".tmp", path)
+
+#___________________________________________________________________________________________________
+def getFileHash(manifest, path):
+    """
+        Returns the content hash of a file, reusing the hash in the manifest if the size and
+        the modification time of the file did not change.
+    """
+
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    known = manifest["files"].get(path)
+
+    if known is not None and known[0] == stat.st_size and known[1] == stat.st_mtime_ns:
+        return known[2]
+
+    file_hash = hashFile(path)
+    manifest["files"][path] = [stat.st_size, stat.st_mtime_ns, file_hash]
+
+    return file_hash
+
+#___________________________________________________________________________________________________
+def getSourceHash(manifest, extractor):
+    """
+        Returns the combined hash of the source of an extractor module and the engine modules.
+    """
+
+    digest = hashlib.sha256()
+
+    for name in (extractor + ".py",) + ENGINE_MODULES:
+        digest.update(getFileHash(manifest, os.path.join(LIB_DIR, name)).encode("ascii"))
+
+    return digest.hexdigest()
+
+#___________________________________________________________________________________________________
+def getFingerprint(manifest, job):
+    """
+        Returns the hashes of all inputs of a job.
+    """
+
+    return {
+        "pdf": getFileHash(manifest, job["pdf"]),
+        "acronyms": getFileHash(manifest, job["acronyms"]) if job["acronyms"] != "" else "",
+        "source": getSourceHash(manifest, job["extractor"]),
+        "backend": pdf_text.getBackendVersion(),
+    }
+
+#___________________________________________________________________________________________________
+def getOutputPath(job):
+    """
+        Returns the absolute path of the output file of a job (output folder and compression
+        from the job options).
+    """
+
+    options = job.get("options", {})
+
+    return os.path.abspath(writer.getOutputPath(job["pdf"], options.get("output_dir"), options.get("compression")))
+
+#___________________________________________________________________________________________________
+def isStale(manifest, job, fingerprint):
+    """
+        Checks if the output of a job needs to be extracted again.
+    """
+
+    output_path = getOutputPath(job)
+    built = manifest["outputs"].get(output_path)
+
+    if built is None or not os.path.isfile(output_path):
+        return True
+
+    for key, value in fingerprint.items():
+        if built.get(key) != value:
+            return True
+
+    return built.get("output") != getFileHash(manifest, output_path)
+
+#___________________________________________________________________________________________________
+def selectStale(manifest, jobs):
+    """
+        Splits the jobs in stale and up-to-date jobs. The fingerprint of every stale job is
+        stored in the job ("fingerprint") for recordBuild.
+    """
+
+    stale = []
+    fresh = []
+
+    for job in jobs:
+        # a job with missing inputs is extracted and fails in the batch (see batch.runBatch)
+        if len(registry.getMissingInputs(job)) > 0:
+            stale.append(dict(job, fingerprint=None))
+            continue
+
+        fingerprint = getFingerprint(manifest, job)
+
+        if isStale(manifest, job, fingerprint):
+            stale.append(dict(job, fingerprint=fingerprint))
+        else:
+            fresh.append(job)
+
+    return stale, fresh
+
+#___________________________________________________________________________________________________
+def recordBuild(manifest, job):
+    """
+        Records the successful extraction of a stale job in the manifest.
+    """
+
+    output_path = getOutputPath(job)
+
+    manifest["outputs"][output_path] = dict(job["fingerprint"], output=getFileHash(manifest, output_path))
@@ -0,0 +1,82 @@
+"""
+    Registry of the supported requirements documents.
+
+    Every document is identified by the file name of its PDF without extension (document key)
+    and is extracted by one ex_*.py module of this lib. The acronym file of a document is
+    located next to the PDF.
+
+    The registry itself imports no extractor: a module (and with it the engine) is imported by
+    loadExtractor when a document of it is extracted, and compiles its profile right then,
+    once per process. Commands that do not extract start without the import cost.
+
+"""
+
+import importlib
+import os
+
+DOCUMENTS = {
+    "MPY-SPB-SRS-001": ("ex_MPY_SPB_SRS", "MPY-SPB-SRS-001 Acronyms.txt"),
+    "E1356-CS-SRS-01_I1_R3": ("ex_E_CS_SRS", "E1356-CS-SRS-01_I1_R3 Acronyms.txt"),
+    "E1356-GTD-SRS-01_I1_R4": ("ex_E_GTD_SRS", "E1356-GTD-SRS-01_I1_R4 Acronyms.txt"),
+    "E1356-GTD-TR-01_I2_R1": ("ex_E_GTD_TR", "E1356-GTD-TR-01-I2-R1 Acronyms.txt"),
+    "RTEMS_SRS": ("ex_RTEMS_SRS", "RTEMS_SRS Acronyms.txt"),
+    "RTEMS_ICD": ("ex_RTEMS_ICD", "RTEMS_ICD Acronyms.txt"),
+    "SAVOIR-GS-001": ("ex_SAVOIR_GS", "SAVOIR-GS-001 Acronyms.txt"),
+    "SAVOIR-GS-DSSnIRD-006": ("ex_SAVOIR_GS_DSSnIRD", "SAVOIR-GS-DSSnIRD-006 Acronyms.txt"),
+    "SAVOIR-GS-EPFS-005": ("ex_SAVOIR_GS_EPFS", "SAVOIR-GS-EPFS-005 Acronyms.txt"),
+    "SAVOIR-GS-FCIS-002": ("ex_SAVOIR_GS_FCIS", "SAVOIR-GS-FCIS-002 Acronyms.txt"),
+    "SAVOIR-GS-OBCSRD-008": ("ex_SAVOIR_GS_OBCSRD", "SAVOIR-GS-OBCSRD-008 Acronyms.txt"),
+    "SAVOIR-GS-RTUFuOR-003": ("ex_SAVOIR_GS_RTUFuOR", "SAVOIR-GS-RTUFuOR-003 Acronyms.txt"),
+}
+
+#___________________________________________________________________________________________________
+def getDocumentKey(path_to_doc):
+    """
+        Returns the document key of a PDF path, i.e. the file name without extension.
+    """
+
+    return os.path.splitext(os.path.basename(path_to_doc))[0]
+
+#___________________________________________________________________________________________________
+def loadExtractor(extractor):
+    """
+        Returns an extractor module (e.g. "ex_SAVOIR_GS"), imported on first use. The module
+        compiles its profile when it is imported (PIPELINE).
+    """
+
+    return importlib.import_module("lib." + extractor)
+
+#___________________________________________________________________________________________________
+def makeJob(path_to_doc, path_to_acronyms=None, extractor=None):
+    """
+        Pairs a PDF with its extractor module and its acronym file.
+        Missing values are taken from the registry. An acronym file that does not exist
+        is replaced by "" (no acronym resolution).
+    """
+
+    key = getDocumentKey(path_to_doc)
+
+    if key in DOCUMENTS:
+        default_extractor, acronym_file = DOCUMENTS[key]
+    else:
+        default_extractor, acronym_file = None, key + " Acronyms.txt"
+
+    if extractor is None:
+        extractor = default_extractor
+    if extractor is None:
+        raise ValueError("No extractor registered for document " + key)
+
+    if path_to_acronyms is None:
+        path_to_acronyms = os.path.join(os.path.dirname(path_to_doc), acronym_file)
+        if not os.path.isfile(path_to_acronyms):
+            path_to_acronyms = ""
+
+    return {"key": key, "pdf": path_to_doc, "acronyms": path_to_acronyms, "extractor": extractor}
+
+#___________________________________________________________________________________________________
+def getMissingInputs(job):
+    """
+        Returns the input files of a job (PDF, acronym file) that do not exist or are no files.
+    """
+
+    return [path for path in (job["pdf"], job["acronyms"]) if path != "" and not os.path.isfile(path)]
@@ -0,0 +1,274 @@
+"""
+    Differences between two revisions (issues) of a requirements document.
+
+    Both revisions are extracted with the same extractor and their requirements are matched:
+        1. by requirement ID (IDs found once in each revision)
+        2. by content hash of the requirement text
+        3. by similar content (MinHash/LSH, see dedup.py) for the rest
+    Every requirement is then classified as
+        added       only in the new revision
+        removed     only in the old revision
+        modified    matched, but with a different text
+        moved       same text, but out of order relative to the other matched requirements
+    All steps are linear in the number of requirements, except the moves: the longest
+    increasing subsequence of the matched positions (O(n log n)) stays in order, the other
+    matched requirements were moved. No text is diffed against all others.
+
+    Both revisions are resolved with one acronym file (default: the file of the new revision),
+    otherwise every requirement with an acronym would be reported as modified. The diff warns
+    if the two revisions come with different acronym files.
+
+    The profiles strip strings of the issue they were written for, e.g. ex_SAVOIR_GS removes
+    "Issue 2 Rev 1", "Date 18/06/2019" and the page footers "Page n/112" of a 112 page issue.
+    In another issue these strings do not match, stay in the text and make the requirements
+    around them show up as modified; adapt the profile (or use an extractor for the new issue)
+    before comparing.
+
+"""
+
+import bisect
+import hashlib
+
+from lib import dedup, engine
+
+#___________________________________________________________________________________________________
+def getContentHash(text):
+
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+#___________________________________________________________________________________________________
+def getUniqueIds(records):
+    """
+        Returns a dictionary normalized ID -> index of the records whose ID occurs only once.
+    """
+
+    ids = {}
+
+    for n, record in enumerate(records):
+        if record["id"] != "":
+            req_id = engine.normalizeId(record["id"])
+            ids[req_id] = None if req_id in ids else n
+
+    return {req_id: n for req_id, n in ids.items() if n is not None}
+
+#___________________________________________________________________________________________________
+def getIncreasing(sequence):
+    """
+        Returns the positions of a longest strictly increasing subsequence of sequence
+        (patience sorting).
+    """
+
+    tails = []
+    tail_positions = []
+    previous = [-1] * len(sequence)
+
+    for n, value in enumerate(sequence):
+        i = bisect.bisect_left(tails, value)
+        if i == len(tails):
+            tails.append(value)
+            tail_positions.append(n)
+        else:
+            tails[i] = value
+            tail_positions[i] = n
+
+        previous[n] = tail_positions[i - 1] if i > 0 else -1
+
+    positions = set()
+    n = tail_positions[-1] if len(tail_positions) > 0 else -1
+    while n != -1:
+        positions.add(n)
+        n = previous[n]
+
+    return positions
+
+#___________________________________________________________________________________________________
+def matchRecords(old, new, similarity=0.5):
+    """
+        Matches the requirements of two revisions. Returns a list of (old index, new index,
+        match) with match "id", "content" or "similar".
+    """
+
+    pairs = []
+    old_matched = [False] * len(old)
+    new_matched = [False] * len(new)
+
+    def addPair(i, j, match):
+        pairs.append((i, j, match))
+        old_matched[i] = True
+        new_matched[j] = True
+
+    old_ids = getUniqueIds(old)
+    for req_id, j in getUniqueIds(new).items():
+        if req_id in old_ids:
+            addPair(old_ids[req_id], j, "id")
+
+    # equal texts are matched in the order of their occurrence
+    old_hashes = {}
+    for i in range(len(old) - 1, -1, -1):
+        if not old_matched[i]:
+            old_hashes.setdefault(getContentHash(old[i]["text"]), []).append(i)
+
+    for j, record in enumerate(new):
+        if new_matched[j]:
+            continue
+
+        candidates = old_hashes.get(getContentHash(record["text"]))
+        if candidates:
+            addPair(candidates.pop(), j, "content")
+
+    old_rest = [i for i in range(0, len(old)) if not old_matched[i]]
+    new_rest = [j for j in range(0, len(new)) if not new_matched[j]]
+
+    if len(old_rest) > 0 and len(new_rest) > 0:
+        texts = [old[i]["text"] for i in old_rest] + [new[j]["text"] for j in new_rest]
+        clusters, _ = dedup.findDuplicates(texts, threshold=similarity)
+
+        for cluster in clusters:
+            old_members = [old_rest[n] for n in cluster if n < len(old_rest)]
+            new_members = [new_rest[n - len(old_rest)] for n in cluster if n >= len(old_rest)]
+
+            for i, j in zip(old_members, new_members):
+                addPair(i, j, "similar")
+
+    return sorted(pairs)
+
+#___________________________________________________________________________________________________
+def diffRecords(old, new, similarity=0.5):
+    """
+        Compares the records of two revisions (see engine.getRecords).
+
+        similarity: minimum similarity (Jaccard of the word shingles) of a modified requirement
+                    without ID to its old text
+
+        Returns a list of changes in the order of the new revision (removed requirements after
+        their predecessor), every change a dictionary with the keys "change", "match", "old"
+        and "new" (records or None), and the number of unchanged requirements.
+    """
+
+    pairs = matchRecords(old, new, similarity)
+    in_order = getIncreasing([j for _, j, _ in pairs])
+
+    changes = []
+    unchanged = 0
+    matched_old = set()
+
+    for n, (i, j, match) in enumerate(pairs):
+        matched_old.add(i)
+
+        if old[i]["text"] != new[j]["text"]:
+            change = "modified"
+        elif n not in in_order:
+            change = "moved"
+        else:
+            unchanged += 1
+            continue
+
+        changes.append({"change": change, "match": match, "old": old[i], "new": new[j]})
+
+    # position of every change in the new revision; a removed requirement follows the new
+    # position of the last matched requirement before it
+    positions = [(change["new"]["ordinal"], 1, change) for change in changes]
+    position = -1
+    new_index = {i: j for i, j, _ in pairs}
+
+    for i, record in enumerate(old):
+        if i in matched_old:
+            position = new_index[i]
+        else:
+            positions.append((position, 2, {"change": "removed", "match": "", "old": record, "new": None}))
+
+    matched_new = set(new_index.values())
+    for j, record in enumerate(new):
+        if j not in matched_new:
+            positions.append((j, 1, {"change": "added", "match": "", "old": None, "new": record}))
+
+    positions.sort(key=lambda entry: entry[:2])
+
+    return [change for _, _, change in positions], unchanged
+
+#___________________________________________________________________________________________________
+def getLabel(record):
+
+    label = "line " + str(record["ordinal"] + 1) + " (" + engine.getPageLabel(record) + ")"
+    if record["id"] != "":
+        label = record["id"] + " " + label
+
+    return label
+
+#___________________________________________________________________________________________________
+def printChanges(changes, unchanged):
+
+    counts = {"added": 0, "removed": 0, "modified": 0, "moved": 0}
+
+    for change in changes:
+        old, new = change["old"], change["new"]
+        counts[change["change"]] += 1
+
+        if change["change"] == "added":
+            print("+ " + getLabel(new) + ": " + new["text"])
+        elif change["change"] == "removed":
+            print("- " + getLabel(old) + ": " + old["text"])
+        elif change["change"] == "moved":
+            print("> " + getLabel(new) + " (was line " + str(old["ordinal"] + 1) + ")")
+        else:
+            print("~ " + getLabel(new) + " (was line " + str(old["ordinal"] + 1) + ", matched by " + change["match"] + ")")
+            print("    old: " + old["text"])
+            print("    new: " + new["text"])
+
+    print(", ".join(str(count) + " " + name for name, count in counts.items()) + ", " + str(unchanged) + " unchanged")
+
+#___________________________________________________________________________________________________
+def main(argv):
+    """
+        Command line of the revision diff, see main.py.
+    """
+
+    import argparse
+    import json
+    import os
+    import sys
+
+    from lib import registry
+    from lib.page_cache import hashFile
+
+    parser = argparse.ArgumentParser(prog="main.py diff", description="Compare the requirements of two revisions of a document.")
+    parser.add_argument("old", help="PDF of the old revision")
+    parser.add_argument("new", help="PDF of the new revision")
+    parser.add_argument("--extractor", default=None, help="extractor module, e.g. ex_SAVOIR_GS (default: from the registry)")
+    parser.add_argument("--acronyms", default=None, help="acronym file for both revisions, \"\" for none (default: the file of the new revision)")
+    parser.add_argument("--similarity", type=float, default=0.5, help="minimum similarity of a modified requirement without ID (default: 0.5)")
+    parser.add_argument("--output", default=None, help="save the changes as JSON")
+    args = parser.parse_args(argv)
+
+    extractor = args.extractor
+    for path in (args.old, args.new):
+        key = registry.getDocumentKey(path)
+        if extractor is None and key in registry.DOCUMENTS:
+            extractor = registry.DOCUMENTS[key][0]
+
+    if extractor is None:
+        parser.error("No extractor registered for " + args.old + " or " + args.new + ", use --extractor")
+
+    if args.acronyms is not None and args.acronyms != "" and not os.path.isfile(args.acronyms):
+        parser.error("Acronym file not found: " + args.acronyms)
+
+    jobs = [registry.makeJob(path, extractor=extractor) for path in (args.old, args.new)]
+    own_acronyms = [job["acronyms"] for job in jobs]
+    path_to_acronyms = args.acronyms if args.acronyms is not None else own_acronyms[1] or own_acronyms[0]
+
+    if len(set(hashFile(path) if path != "" else None for path in own_acronyms)) > 1:
+        print("Warning: the revisions have different acronym files (" + (own_acronyms[0] or "none") + ", "
+              + (own_acronyms[1] or "none") + "), both are resolved with " + (path_to_acronyms or "none"),
+              file=sys.stderr)
+
+    profile = registry.loadExtractor(extractor).PROFILE
+    revisions = [engine.getRecords(profile, job["pdf"], path_to_acronyms) for job in jobs]
+
+    changes, unchanged = diffRecords(revisions[0], revisions[1], args.similarity)
+    printChanges(changes, unchanged)
+
+    if args.output is not None:
+        with open(args.output, "w") as f:
+            json.dump({"changes": changes, "unchanged": unchanged}, f, indent=1)
+
+    return 0
@@ -0,0 +1,191 @@
+"""
+    Analysis of the requirement operations of the profiles.
+
+    The requirement operations of a profile run on every requirement, one pass per operation.
+    For every document this analysis
+        - counts the requirements changed by every operation; an operation that changes no
+          requirement of the document is reported as dead
+        - plans the fastest grouping of consecutive "sub" operations into fused operations
+          (("sub", [pattern, ...]), one pass for all patterns, see engine.py). A group is only
+          allowed if the fused pass gives exactly the same text as the single operations in
+          sequence for every requirement of the document
+        - benchmarks the operations per requirement, in sequence and as planned
+        - verifies that the planned operations extract the same requirements
+
+    Dead operations are reported but not removed by the plan: they may match in another issue
+    of the document. A fused operation is equivalent on the analysed text; check the plan again
+    when the document changes.
+
+"""
+
+from lib import benchmark, engine, furniture, pdf_text, registry
+
+#___________________________________________________________________________________________________
+def getSegments(pipeline, profile, path_to_doc):
+    """
+        Returns the pages of a document and its raw requirements (before the requirement
+        operations).
+    """
+
+    pages = pdf_text.getPagesFromPDF(path_to_doc, engine.getPageNumbers(profile, path_to_doc))
+
+    if pipeline.furniture:
+        text = "".join(furniture.removeFurniture(pages))
+    else:
+        text = "".join(pages)
+
+    return pages, pipeline.splitText(text)
+
+#___________________________________________________________________________________________________
+def getPatterns(operation):
+
+    return operation[1] if isinstance(operation[1], list) else [operation[1]]
+
+#___________________________________________________________________________________________________
+def fuseOperations(operations):
+    """
+        Returns one fused "sub" operation for consecutive "sub" operations with the same
+        replacement, or None if they cannot be fused.
+    """
+
+    replacements = set(operation[2] if len(operation) > 2 else "" for operation in operations)
+
+    if any(operation[0] != "sub" for operation in operations) or len(replacements) != 1:
+        return None
+
+    patterns = [pattern for operation in operations for pattern in getPatterns(operation)]
+    replacement = replacements.pop()
+
+    return ("sub", patterns, replacement) if replacement != "" else ("sub", patterns)
+
+#___________________________________________________________________________________________________
+def applyOperation(function, texts):
+
+    return [function(text) for text in texts]
+
+#___________________________________________________________________________________________________
+def planOperations(operations, segments, repeat=5):
+    """
+        Finds the fastest equivalent grouping of the operations (dynamic programming over all
+        groups of consecutive operations). Returns the planned operations, the changed
+        requirements per operation and the seconds per pass over all requirements, in sequence
+        and as planned.
+    """
+
+    compiled = [engine.compileOperation(operation) for operation in operations]
+
+    # states[k]: the requirements after the first k operations
+    states = [segments]
+    for function in compiled:
+        states.append(applyOperation(function, states[-1]))
+
+    changes = [sum(1 for a, b in zip(states[k], states[k + 1]) if a != b) for k in range(0, len(operations))]
+
+    def getCost(function, k):
+        summary, _ = benchmark.measure(lambda: applyOperation(function, states[k]), 1, repeat)
+        return summary["min"]
+
+    single = [getCost(function, k) for k, function in enumerate(compiled)]
+
+    # best[j]: (cost, operations) of the fastest plan for the first j operations
+    best = [(0.0, [])]
+    for j in range(1, len(operations) + 1):
+        cost, plan = best[j - 1]
+        best.append((cost + single[j - 1], plan + [operations[j - 1]]))
+
+        for i in range(0, j - 1):
+            fused = fuseOperations(operations[i:j])
+            if fused is None:
+                continue
+
+            function = engine.compileOperation(fused)
+            if applyOperation(function, states[i]) != states[j]:
+                continue
+
+            cost = best[i][0] + getCost(function, i)
+            if cost < best[j][0]:
+                best[j] = (cost, best[i][1] + [fused])
+
+    return best[-1][1], changes, sum(single), best[-1][0]
+
+#___________________________________________________________________________________________________
+def analyzeDocument(job, repeat=5):
+    """
+        Analyses the requirement operations of the profile of one document.
+    """
+
+    profile = registry.loadExtractor(job["extractor"]).PROFILE
+    pipeline = engine.compileProfile(profile)
+    operations = profile.get("requirement", [])
+
+    pages, segments = getSegments(pipeline, profile, job["pdf"])
+
+    plan, changes, sequential, planned = planOperations(operations, segments, repeat)
+
+    # a new pipeline, compileProfile would return the cached pipeline of the document
+    planned_pipeline = engine.Pipeline(dict(profile, requirement=plan))
+
+    return {
+        "document": job["key"],
+        "requirements": len(segments),
+        "operations": [{"operation": operation, "changed": changed} for operation, changed in zip(operations, changes)],
+        "plan": plan,
+        "sequential_us": sequential / max(len(segments), 1) * 1e6,
+        "planned_us": planned / max(len(segments), 1) * 1e6,
+        "identical": planned_pipeline.runPages(pages) == pipeline.runPages(pages),
+    }
+
+#___________________________________________________________________________________________________
+def printAnalysis(result):
+
+    print(result["document"] + ": " + str(len(result["operations"])) + " requirement operations, "
+          + str(result["requirements"]) + " requirements")
+
+    for operation in result["operations"]:
+        if operation["changed"] == 0:
+            print("    dead: " + repr(operation["operation"]))
+
+    print("    %.2f us per requirement in sequence, %.2f us planned in %d passes%s" % (
+        result["sequential_us"], result["planned_us"], len(result["plan"]),
+        " (identical output)" if result["identical"] else " (OUTPUT DIFFERS)"))
+
+    for operation in result["plan"]:
+        if isinstance(operation[1], list):
+            print("    fused: " + repr(operation))
+
+#___________________________________________________________________________________________________
+def main(argv):
+    """
+        Command line of the rule analysis, see main.py.
+    """
+
+    import argparse
+    import json
+
+    from lib import batch
+
+    parser = argparse.ArgumentParser(prog="main.py rules", description="Find dead and fusible requirement operations.")
+    parser.add_argument("documents", nargs="*", help="document keys (default: all)")
+    parser.add_argument("--input-dir", default="input", help="folder with the PDFs (default: input)")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per operation (default: 5)")
+    parser.add_argument("--output", default=None, help="save the analysis as JSON")
+    args = parser.parse_args(argv)
+
+    if args.repeat < 1:
+        parser.error("--repeat must be at least 1")
+
+    try:
+        jobs = batch.findDocuments(args.input_dir, args.documents)
+    except ValueError as e:
+        parser.error(str(e))
+
+    results = []
+    for job in jobs:
+        results.append(analyzeDocument(job, args.repeat))
+        printAnalysis(results[-1])
+
+    if args.output is not None:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=1)
+
+    return 0 if all(result["identical"] for result in results) else 1
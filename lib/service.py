@@ -0,0 +1,379 @@
+"""
+    Resident extraction service.
+
+    A fixed pool of worker processes keeps everything a run would load again warm: the PDF
+    decoder, the extractor modules with their compiled profiles, the acronym matchers of the
+    registered documents and the page cache. Documents are extracted on request and returned
+    with their metadata (see engine.getRecords); for a document in the page cache the answer
+    takes milliseconds.
+
+    The service speaks HTTP with JSON bodies, on a Unix socket (default) or on a localhost port:
+
+    POST /extract   {"pdf": path, "document": key, "extractor": module, "acronyms": path}
+                    extracts a PDF file. The extractor and the acronym file are taken from the
+                    registry like in a manifest (see batch.py); "document" selects the registry
+                    entry if the file name is no document key, without "pdf" it extracts the
+                    registered PDF in the input folder
+    POST /extract?document=key[&extractor=module][&acronyms=path]
+                    extracts the uploaded PDF in the request body (Content-Type application/pdf)
+    GET /status     number of workers, queued and running jobs and counters
+
+    The answer of /extract is {"document": key, "extractor": module, "seconds": s,
+    "requirements": [record, ...]}, an error is answered with {"error": message} and status
+    400 (invalid request), 503 (queue full), 504 (timeout) or 500 (extraction failed).
+
+    At most `queue_size` jobs wait for a free worker; further requests are rejected at once
+    with 503, so the callers can back off instead of piling up. A job that exceeds the timeout
+    is answered with 504 but finishes in its worker.
+
+    EXAMPLE:
+    curl --unix-socket .cache/service.sock -d '{"pdf": "input/RTEMS_ICD.pdf"}' http://localhost/extract
+
+"""
+
+import contextlib
+import http.client
+import importlib
+import json
+import os
+import socket
+import socketserver
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+from lib import registry
+
+DEFAULT_SOCKET_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                   ".cache", "service.sock")
+
+#___________________________________________________________________________________________________
+def warmUp(input_dir):
+    """
+        Runs once in every worker process: imports the PDF decoder and all extractor modules
+        (compiling their profiles), opens the page cache and compiles the acronym matchers of
+        the registered documents in the input folder.
+    """
+
+    from lib import acronyms, pdf_text
+
+    package = getattr(pdf_text.getBackend(), "package", None)
+    if package is not None:
+        with contextlib.suppress(ImportError):
+            importlib.import_module(package)
+
+    pdf_text.getCache()
+
+    for extractor, acronym_file in registry.DOCUMENTS.values():
+        registry.loadExtractor(extractor)
+
+        path_to_acronyms = os.path.join(input_dir, acronym_file)
+        if os.path.isfile(path_to_acronyms):
+            acronyms.getMatcher(path_to_acronyms)
+
+#___________________________________________________________________________________________________
+def extractJob(job, data=None):
+    """
+        Extracts one job in a worker process and returns the answer of /extract.
+        data: the bytes of an uploaded PDF, else the file job["pdf"] is read.
+    """
+
+    from lib import engine
+
+    start = time.perf_counter()
+    path_to_doc = job["pdf"]
+
+    if data is not None:
+        handle, path_to_doc = tempfile.mkstemp(suffix=".pdf")
+        with os.fdopen(handle, "wb") as f:
+            f.write(data)
+
+    try:
+        profile = registry.loadExtractor(job["extractor"]).PROFILE
+        records = engine.getRecords(profile, path_to_doc, job["acronyms"])
+    finally:
+        if data is not None:
+            os.remove(path_to_doc)
+
+    return {"document": job["key"], "extractor": job["extractor"], "seconds": time.perf_counter() - start,
+            "requirements": records}
+
+#___________________________________________________________________________________________________
+def makeJob(request, input_dir="input", upload=False):
+    """
+        Creates the job of an extraction request (see /extract). Raises ValueError if the
+        request is invalid.
+    """
+
+    document = request.get("document")
+    pdf = request.get("pdf")
+
+    if upload or pdf is None:
+        if document is None:
+            raise ValueError("no document given")
+        # an uploaded PDF is extracted like the registered document in the input folder
+        pdf = os.path.join(input_dir, document + ".pdf")
+
+    extractor = request.get("extractor")
+    if extractor is None and document is not None:
+        extractor = registry.DOCUMENTS.get(document, (None, None))[0]
+
+    job = registry.makeJob(pdf, request.get("acronyms"), extractor)
+
+    # only registered extractor modules are imported
+    if job["extractor"] not in set(entry[0] for entry in registry.DOCUMENTS.values()):
+        raise ValueError("Unknown extractor " + job["extractor"])
+    if not upload and not os.path.isfile(job["pdf"]):
+        raise ValueError("PDF not found: " + job["pdf"])
+    if job["acronyms"] != "" and not os.path.isfile(job["acronyms"]):
+        raise ValueError("Acronym file not found: " + job["acronyms"])
+
+    if document is not None:
+        job["key"] = document
+
+    return job
+
+#___________________________________________________________________________________________________
+class Service:
+    """
+        Pool of warm worker processes with a bounded job queue.
+    """
+
+    def __init__(self, workers=None, queue_size=16, input_dir="input", timeout=None):
+
+        self.workers = workers or os.cpu_count() or 1
+        self.queue_size = queue_size
+        self.input_dir = input_dir
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        self.pending = 0
+        self.counters = {"completed": 0, "failed": 0, "rejected": 0}
+        self.executor = ProcessPoolExecutor(max_workers=self.workers, initializer=warmUp, initargs=(input_dir,))
+
+        # start and warm up all workers now, not with the first requests
+        for future in [self.executor.submit(time.sleep, 0.1) for _ in range(0, self.workers)]:
+            future.result()
+
+    def submit(self, job, data=None):
+        """
+            Queues a job. Returns its future, or None if the queue is full.
+        """
+
+        with self.lock:
+            if self.pending >= self.workers + self.queue_size:
+                self.counters["rejected"] += 1
+                return None
+            self.pending += 1
+
+        future = self.executor.submit(extractJob, job, data)
+        future.add_done_callback(self.finish)
+
+        return future
+
+    def finish(self, future):
+
+        with self.lock:
+            self.pending -= 1
+            self.counters["completed" if future.exception() is None else "failed"] += 1
+
+    def getStatus(self):
+
+        with self.lock:
+            return dict(self.counters, workers=self.workers, queue_size=self.queue_size,
+                        running=min(self.pending, self.workers), queued=max(self.pending - self.workers, 0))
+
+    def close(self):
+
+        self.executor.shutdown(cancel_futures=True)
+
+#___________________________________________________________________________________________________
+class RequestHandler(BaseHTTPRequestHandler):
+    """
+        HTTP interface of the service (see above), one thread per connection.
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def sendJson(self, status, answer):
+
+        body = json.dumps(answer).encode("utf-8")
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if self.close_connection:
+            self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+
+        if urlsplit(self.path).path != "/status":
+            self.sendJson(404, {"error": "unknown path " + self.path})
+            return
+
+        self.sendJson(200, self.server.service.getStatus())
+
+    def do_POST(self):
+
+        url = urlsplit(self.path)
+
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+        except ValueError:
+            length = -1
+
+        if length < 0:
+            # the body cannot be skipped, the connection is not reused
+            self.close_connection = True
+            self.sendJson(400, {"error": "invalid Content-Length " + repr(self.headers.get("Content-Length"))})
+            return
+
+        body = self.rfile.read(length)
+
+        if url.path != "/extract":
+            self.sendJson(404, {"error": "unknown path " + self.path})
+            return
+
+        service = self.server.service
+        upload = self.headers.get("Content-Type", "") == "application/pdf"
+
+        try:
+            request = dict(parse_qsl(url.query)) if upload else json.loads(body.decode("utf-8"))
+            job = makeJob(request, service.input_dir, upload)
+        except (ValueError, AttributeError) as e:
+            self.sendJson(400, {"error": str(e)})
+            return
+
+        future = service.submit(job, body if upload else None)
+        if future is None:
+            self.sendJson(503, {"error": "queue full"})
+            return
+
+        try:
+            answer = future.result(service.timeout)
+        except TimeoutError:
+            self.sendJson(504, {"error": "extraction exceeded " + str(service.timeout) + " seconds"})
+            return
+        except Exception as e:
+            self.sendJson(500, {"error": type(e).__name__ + ": " + str(e)})
+            return
+
+        self.sendJson(200, answer)
+
+    def address_string(self):
+
+        # the client of a Unix socket has no address
+        return self.client_address[0] if isinstance(self.client_address, tuple) else "local"
+
+#___________________________________________________________________________________________________
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+
+    daemon_threads = True
+
+#___________________________________________________________________________________________________
+def createServer(service, socket_path=DEFAULT_SOCKET_PATH, port=None):
+    """
+        Creates the HTTP server of a service on a Unix socket, or on a localhost port if given.
+    """
+
+    if port is not None:
+        server = ThreadingHTTPServer(("127.0.0.1", port), RequestHandler)
+    else:
+        os.makedirs(os.path.dirname(os.path.abspath(socket_path)), exist_ok=True)
+        # a socket file left by a service that was killed
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        server = UnixHTTPServer(socket_path, RequestHandler)
+
+    server.service = service
+
+    return server
+
+#___________________________________________________________________________________________________
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """
+        HTTP connection over a Unix socket.
+    """
+
+    def __init__(self, socket_path, timeout=None):
+
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+#___________________________________________________________________________________________________
+def connect(socket_path=DEFAULT_SOCKET_PATH, port=None, timeout=None):
+    """
+        Returns a connection to a running service. It can be used for several requests.
+    """
+
+    if port is not None:
+        return http.client.HTTPConnection("127.0.0.1", port, timeout=timeout)
+
+    return UnixHTTPConnection(socket_path, timeout)
+
+#___________________________________________________________________________________________________
+def requestExtraction(connection, pdf=None, data=None, **fields):
+    """
+        Sends an extraction request over a connection (see connect) and returns the answer.
+        pdf: path of a PDF readable by the service, or data: the bytes of a PDF to upload
+        (with fields["document"]). Raises RuntimeError with the message of an error answer.
+    """
+
+    if data is not None:
+        connection.request("POST", "/extract?" + urlencode(fields), data, {"Content-Type": "application/pdf"})
+    else:
+        body = json.dumps(dict(fields, pdf=pdf)).encode("utf-8")
+        connection.request("POST", "/extract", body, {"Content-Type": "application/json"})
+
+    response = connection.getresponse()
+    answer = json.loads(response.read().decode("utf-8"))
+
+    if response.status != 200:
+        raise RuntimeError(str(response.status) + ": " + answer["error"])
+
+    return answer
+
+#___________________________________________________________________________________________________
+def main(argv):
+    """
+        Command line of the service, see main.py.
+    """
+
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="main.py serve", description="Run the resident extraction service.")
+    parser.add_argument("--socket", default=DEFAULT_SOCKET_PATH, help="Unix socket of the service (default: .cache/service.sock)")
+    parser.add_argument("--port", type=int, default=None, help="serve on this localhost port instead of the Unix socket")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--queue-size", type=int, default=16, help="jobs waiting for a worker before requests are rejected (default: 16)")
+    parser.add_argument("--timeout", type=float, default=None, help="seconds after which a request is answered with 504")
+    parser.add_argument("--input-dir", default="input", help="folder with the registered PDFs and acronym files (default: input)")
+    args = parser.parse_args(argv)
+
+    service = Service(args.workers, args.queue_size, args.input_dir, args.timeout)
+    server = createServer(service, args.socket, args.port)
+    address = "http://127.0.0.1:" + str(args.port) if args.port is not None else args.socket
+
+    print("Serving " + str(service.workers) + " warm workers on " + address + ", Ctrl+C to stop.")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("Stopped.")
+    finally:
+        server.server_close()
+        service.close()
+        if args.port is None and os.path.exists(args.socket):
+            os.remove(args.socket)
+
+    return 0
@@ -0,0 +1,223 @@
+"""
+    Streaming execution of a compiled profile (see engine.py).
+
+    The pages of a document are fed one after another through the boilerplate operations and
+    the split tree. A requirement is emitted as soon as the boundary closing it has been
+    seen, so the first requirements are available before the last page is decoded and the
+    memory needed stays roughly constant in the size of the document.
+
+    Every stage holds back the last MARGIN characters of its input until more text arrives,
+    so a pattern match is never cut in two. The result is identical to the batch execution
+    as long as no single pattern match is longer than MARGIN characters. "cut" operations
+    are not supported in the boilerplate, they are only meaningful on the full text.
+
+"""
+
+import re
+
+MARGIN = 4096
+
+#___________________________________________________________________________________________________
+def getBoundary(regex, text, limit):
+    """
+        Returns the largest position <= limit at which text can be cut without cutting a
+        match of regex in two.
+    """
+
+    for match in regex.finditer(text):
+        if match.end() >= limit:
+            return min(match.start(), limit)
+
+    return limit
+
+#___________________________________________________________________________________________________
+class OperationStage:
+    """
+        Applies one text operation (substitution) to a stream of text chunks.
+    """
+
+    def __init__(self, operation, pattern, target):
+
+        self.operation = operation
+        self.regex = pattern
+        self.target = target
+        self.buffer = ""
+
+    def feed(self, chunk):
+
+        self.buffer += chunk
+        if len(self.buffer) <= 2 * MARGIN:
+            return
+
+        cut = getBoundary(self.regex, self.buffer, len(self.buffer) - MARGIN)
+        if cut > 0:
+            self.target.feed(self.operation(self.buffer[:cut]))
+            self.buffer = self.buffer[cut:]
+
+    def close(self):
+
+        self.target.feed(self.operation(self.buffer))
+        self.buffer = ""
+        self.target.close()
+
+#___________________________________________________________________________________________________
+class RequirementSink:
+    """
+        Collects the text of one requirement and emits it when the requirement is closed.
+    """
+
+    def __init__(self, emit):
+
+        self.emit = emit
+        self.parts = []
+
+    def feed(self, chunk):
+
+        self.parts.append(chunk)
+
+    def close(self):
+
+        self.emit("".join(self.parts))
+        self.parts = []
+
+#___________________________________________________________________________________________________
+class SplitStage:
+    """
+        Streaming form of one node of the split tree. The text between two matches of the
+        split pattern is one part; every part is fed to a new consumer created for the node
+        of the part (child node or requirement sink), skipped parts are discarded.
+    """
+
+    def __init__(self, node, emit):
+
+        self.regex = re.compile(node["split"])
+        self.node = node
+        self.emit = emit
+        self.buffer = ""
+        self.index = -1
+        self.consumer = None
+        self.nextPart()
+
+    def nextPart(self):
+
+        if self.consumer is not None:
+            self.consumer.close()
+
+        self.index += 1
+        node = self.node
+        part = self.index - node.get("skip", 0)
+
+        if part < 0:
+            child = None
+        elif node["leaf"]:
+            child = "requirement"
+        elif node["each"] is not None:
+            child = node["each"]
+        elif part < len(node["parts"]):
+            child = node["parts"][part]
+        else:
+            child = node["rest"]
+
+        if child is None:
+            self.consumer = None
+        elif child == "requirement":
+            self.consumer = RequirementSink(self.emit)
+        else:
+            self.consumer = SplitStage(child, self.emit)
+
+    def forward(self, text):
+
+        if self.consumer is not None and text != "":
+            self.consumer.feed(text)
+
+    def process(self, limit):
+        """
+            Handles all matches ending before limit and forwards the text in front of limit.
+        """
+
+        position = 0
+
+        for match in self.regex.finditer(self.buffer):
+            if match.end() >= limit:
+                limit = min(limit, match.start())
+                break
+            self.forward(self.buffer[position:match.start()])
+            self.nextPart()
+            position = match.end()
+
+        if limit > position:
+            self.forward(self.buffer[position:limit])
+            position = limit
+
+        self.buffer = self.buffer[position:]
+
+    def feed(self, chunk):
+
+        self.buffer += chunk
+        if len(self.buffer) > 2 * MARGIN:
+            self.process(len(self.buffer) - MARGIN)
+
+    def close(self):
+
+        self.process(len(self.buffer) + 1)
+        self.forward(self.buffer)
+        self.buffer = ""
+
+        if self.consumer is not None:
+            self.consumer.close()
+            self.consumer = None
+
+#___________________________________________________________________________________________________
+def getStreamNode(profile_node, compiled_node):
+    """
+        Merges the pattern of a profile node into the compiled node of the pipeline.
+    """
+
+    if profile_node is None:
+        return None
+
+    node = dict(compiled_node)
+    node["split"] = profile_node["split"]
+    node["each"] = getStreamNode(profile_node.get("each"), compiled_node["each"])
+    node["parts"] = [getStreamNode(p, c) for p, c in zip(profile_node.get("parts", []), compiled_node["parts"])]
+    node["rest"] = getStreamNode(profile_node.get("rest"), compiled_node["rest"])
+
+    return node
+
+#___________________________________________________________________________________________________
+def iterRequirements(pipeline, pages):
+    """
+        Generator over the requirements of a document, given as iterable of page texts.
+        Yields the same requirements as pipeline.runPages(list(pages)).
+    """
+
+    from lib import engine, furniture
+
+    profile = pipeline.profile
+    found = []
+
+    stage = SplitStage(getStreamNode(profile["segments"], pipeline.segments), found.append)
+
+    for operation, function in reversed(list(zip(profile.get("boilerplate", []), pipeline.boilerplate))):
+        if operation[0] == "cut":
+            raise ValueError(pipeline.document + ": \"cut\" in the boilerplate cannot be streamed")
+        stage = OperationStage(function, re.compile(engine.getPattern(operation)), stage)
+
+    if pipeline.furniture:
+        pages = furniture.iterRemoveFurniture(pages)
+
+    for page in pages:
+        stage.feed(page)
+
+        for req in found:
+            req = pipeline.cleanRequirement(req)
+            if req is not None:
+                yield req
+        del found[:]
+
+    stage.close()
+
+    for req in found:
+        req = pipeline.cleanRequirement(req)
+        if req is not None:
+            yield req
@@ -0,0 +1,202 @@
+"""
+    Equivalence check of the engine variants against golden outputs.
+
+    Every variant extracts every document into a temporary folder. The result is compared
+    line by line (one line = one requirement) with the golden output file of the document; the
+    lines are compared by their hashes, and the first diverging requirement is reported
+    with the lines around it.
+
+    VARIANTS:
+    "serial"        pages decoded in this process, without page cache
+    "parallel"      pages decoded by PARALLEL_WORKERS processes, without page cache
+    "cached"        second run on a fresh page cache (all pages served from the cache)
+    "stream"        page by page streaming extraction (see stream.py)
+
+    The golden outputs default to the output folder. The committed files there are partly
+    cleaned by hand, so a snapshot of the raw output of the serial variant can be recorded
+    with --record and used as golden folder instead.
+
+"""
+
+import hashlib
+import os
+import tempfile
+
+from lib import batch, pdf_text, registry
+
+PARALLEL_WORKERS = 4
+CONTEXT = 2
+
+#___________________________________________________________________________________________________
+def runSerial(job, output_path, scratch):
+
+    pdf_text.configure(cache="off", processes=1)
+    extractJob(job, output_path)
+
+#___________________________________________________________________________________________________
+def runParallel(job, output_path, scratch):
+
+    pdf_text.configure(cache="off", processes=PARALLEL_WORKERS)
+    extractJob(job, output_path)
+
+#___________________________________________________________________________________________________
+def runCached(job, output_path, scratch):
+
+    pdf_text.configure(cache=os.path.join(scratch, job["key"] + ".sqlite"), processes=1)
+    extractJob(job, output_path)
+    extractJob(job, output_path)
+
+#___________________________________________________________________________________________________
+def runStream(job, output_path, scratch):
+
+    pdf_text.configure(cache="off", processes=1)
+    extractJob(job, output_path, stream=True)
+
+VARIANTS = {
+    "serial": runSerial,
+    "parallel": runParallel,
+    "cached": runCached,
+    "stream": runStream,
+}
+
+#___________________________________________________________________________________________________
+def extractJob(job, output_path, **options):
+    """
+        Extracts one document into output_path.
+    """
+
+    module = registry.loadExtractor(job["extractor"])
+
+    module.extract(job["pdf"], job["acronyms"], output_path=output_path, **options)
+
+#___________________________________________________________________________________________________
+def readLines(path):
+    """
+        Returns the lines of a file and the hash of every line.
+    """
+
+    with open(path, "rb") as f:
+        lines = f.read().split(b"\n")
+    if lines[-1] == b"":
+        lines.pop()
+
+    return lines, [hashlib.blake2b(line, digest_size=16).digest() for line in lines]
+
+#___________________________________________________________________________________________________
+def compareFiles(golden_path, output_path):
+    """
+        Compares an output file with its golden file.
+        Returns None if both are equal, else a description of the first divergence.
+    """
+
+    golden, golden_hashes = readLines(golden_path)
+    output, output_hashes = readLines(output_path)
+
+    if golden_hashes == output_hashes:
+        return None
+
+    first = 0
+    while first < min(len(golden_hashes), len(output_hashes)) and golden_hashes[first] == output_hashes[first]:
+        first += 1
+
+    start = max(0, first - CONTEXT)
+    report = ["first divergence in line " + str(first + 1) + " (golden: " + str(len(golden))
+              + " lines, output: " + str(len(output)) + " lines)"]
+
+    for name, lines in (("golden", golden), ("output", output)):
+        report.append("  " + name + ":")
+        for i in range(start, min(len(lines), first + CONTEXT + 1)):
+            marker = ">" if i == first else " "
+            report.append("  " + marker + " " + str(i + 1).rjust(5) + "  " + lines[i].decode("utf-8", "replace"))
+
+    return "\n".join(report)
+
+#___________________________________________________________________________________________________
+def verify(jobs, golden_dir, variants, report=None):
+    """
+        Runs every variant on every job and compares the outputs with the golden folder.
+        Returns a list of (variant, document key, divergence or None).
+    """
+
+    results = []
+    settings = (pdf_text.cache_path, pdf_text.cache_size, pdf_text.workers)
+
+    with tempfile.TemporaryDirectory() as scratch:
+        try:
+            for variant in variants:
+                for job in jobs:
+                    golden_path = os.path.join(golden_dir, job["key"] + ".txt")
+                    output_path = os.path.join(scratch, variant + "-" + job["key"] + ".txt")
+
+                    if not os.path.isfile(golden_path):
+                        divergence = "no golden output " + golden_path
+                    else:
+                        VARIANTS[variant](job, output_path, scratch)
+                        divergence = compareFiles(golden_path, output_path)
+
+                    results.append((variant, job["key"], divergence))
+                    if report is not None:
+                        report(variant, job["key"], divergence)
+        finally:
+            pdf_text.configure(settings[0], settings[1], settings[2])
+
+    return results
+
+#___________________________________________________________________________________________________
+def record(jobs, golden_dir):
+    """
+        Writes the output of the serial variant of every job into the golden folder.
+    """
+
+    settings = (pdf_text.cache_path, pdf_text.cache_size, pdf_text.workers)
+    os.makedirs(golden_dir, exist_ok=True)
+
+    try:
+        for job in jobs:
+            runSerial(job, os.path.join(golden_dir, job["key"] + ".txt"), golden_dir)
+            print("recorded " + job["key"])
+    finally:
+        pdf_text.configure(settings[0], settings[1], settings[2])
+
+#___________________________________________________________________________________________________
+def printResult(variant, key, divergence):
+
+    print("[" + ("ok" if divergence is None else "DIFF") + "] " + variant + " " + key)
+    if divergence is not None:
+        print(divergence)
+
+#___________________________________________________________________________________________________
+def main(argv):
+    """
+        Command line of the equivalence check, see main.py.
+    """
+
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="main.py verify", description="Compare engine variants with golden outputs.")
+    parser.add_argument("documents", nargs="*", help="document keys (default: all)")
+    parser.add_argument("--input-dir", default="input", help="folder with the PDFs (default: input)")
+    parser.add_argument("--golden", default="output", help="folder with the golden outputs (default: output)")
+    parser.add_argument("--variants", default=",".join(VARIANTS), help="comma separated variants (default: all)")
+    parser.add_argument("--record", action="store_true", help="write the serial outputs into the golden folder")
+    args = parser.parse_args(argv)
+
+    variants = [v for v in args.variants.split(",") if v != ""]
+    unknown = [v for v in variants if v not in VARIANTS]
+    if len(unknown) > 0:
+        parser.error("Unknown variants: " + ", ".join(unknown))
+
+    try:
+        jobs = batch.findDocuments(args.input_dir, args.documents)
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.record:
+        record(jobs, args.golden)
+        return 0
+
+    results = verify(jobs, args.golden, variants, report=printResult)
+    failed = [r for r in results if r[2] is not None]
+
+    print(str(len(results) - len(failed)) + " of " + str(len(results)) + " outputs equal the golden outputs.")
+    return 1 if len(failed) > 0 else 0
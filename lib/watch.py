@@ -0,0 +1,314 @@
+"""
+    Watch mode: extracts documents again as soon as their inputs change.
+
+    The input folder and the lib are watched for changes of
+        - a PDF or an acronym file: the document is affected
+        - an ex_*.py module: the documents of the module are affected
+        - a shared engine module (see rebuild.ENGINE_MODULES): all documents are affected
+    A burst of changes (e.g. a PDF being copied, an editor saving several files) is collected
+    until the folders are quiet for `debounce` seconds, then the affected documents go through
+    the incremental rebuild (see rebuild.py): a document whose inputs are unchanged by content is
+    not extracted again. Changed lib modules the watch process has imported are reloaded, so the
+    workers of the next extraction run the new rules.
+
+    On Linux the folders are watched with inotify (through ctypes), elsewhere or with
+    polling=True their files are compared every `interval` seconds.
+
+"""
+
+import ctypes
+import ctypes.util
+import importlib
+import os
+import select
+import struct
+import sys
+import time
+
+from lib import batch, rebuild, registry
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+# a file counts as changed when it is complete: closed after writing, moved in or deleted
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_MOVED_FROM | IN_DELETE
+EVENT = struct.Struct("iIII")
+
+EXTENSIONS = (".pdf", ".txt", ".py")
+
+#___________________________________________________________________________________________________
+class InotifyWatcher:
+    """
+        Watches folders (not recursive) with inotify. Raises OSError if inotify is not available.
+    """
+
+    def __init__(self, directories):
+
+        name = ctypes.util.find_library("c")
+        self.libc = ctypes.CDLL(name, use_errno=True)
+
+        if not hasattr(self.libc, "inotify_init1"):
+            raise OSError("inotify is not available")
+
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+        self.directories = {}
+
+        for directory in directories:
+            wd = self.libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+            if wd < 0:
+                error = ctypes.get_errno()
+                self.close()
+                raise OSError(error, "cannot watch " + directory)
+            self.directories[wd] = directory
+
+    def wait(self, timeout=None):
+        """
+            Waits up to timeout seconds (None: until a change) and returns the set of the
+            changed paths. After an overflow of the event queue, the folders are returned.
+        """
+
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if len(ready) == 0:
+            return set()
+
+        changed = set()
+
+        try:
+            data = os.read(self.fd, 65536)
+        except BlockingIOError:
+            return changed
+
+        position = 0
+        while position + EVENT.size <= len(data):
+            wd, mask, _, length = EVENT.unpack_from(data, position)
+            name = data[position + EVENT.size:position + EVENT.size + length].rstrip(b"\0")
+            position += EVENT.size + length
+
+            if mask & IN_Q_OVERFLOW:
+                changed.update(self.directories.values())
+            elif wd in self.directories and len(name) > 0:
+                changed.add(os.path.join(self.directories[wd], os.fsdecode(name)))
+
+        return changed
+
+    def close(self):
+
+        os.close(self.fd)
+
+#___________________________________________________________________________________________________
+class PollingWatcher:
+    """
+        Watches folders (not recursive) by comparing size and modification time of their files
+        every `interval` seconds.
+    """
+
+    def __init__(self, directories, interval=1.0):
+
+        self.directories = list(directories)
+        self.interval = interval
+        self.files = self.scan()
+
+    def scan(self):
+
+        files = {}
+
+        for directory in self.directories:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_file():
+                            stat = entry.stat()
+                            files[entry.path] = (stat.st_size, stat.st_mtime_ns)
+                    except FileNotFoundError:
+                        # removed while scanning, reported by the next scan
+                        continue
+
+        return files
+
+    def wait(self, timeout=None):
+        """
+            Waits up to timeout seconds (None: until a change) and returns the set of the
+            changed paths.
+        """
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        while True:
+            sleep = self.interval if deadline is None else min(self.interval, max(deadline - time.monotonic(), 0))
+            time.sleep(sleep)
+
+            files = self.scan()
+            changed = set(path for path in files.keys() | self.files.keys() if files.get(path) != self.files.get(path))
+            self.files = files
+
+            if len(changed) > 0 or (deadline is not None and time.monotonic() >= deadline):
+                return changed
+
+    def close(self):
+        pass
+
+#___________________________________________________________________________________________________
+def openWatcher(directories, polling=False, interval=1.0):
+    """
+        Returns an inotify watcher for the folders, or a polling watcher if inotify is not
+        available or polling is requested.
+    """
+
+    if not polling and sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(directories)
+        except (OSError, AttributeError):
+            pass
+
+    return PollingWatcher(directories, interval)
+
+#___________________________________________________________________________________________________
+def waitForChanges(watcher, debounce=0.5):
+    """
+        Waits for the next change and collects further changes until there was none for
+        debounce seconds. Returns the changed paths with a watched extension.
+    """
+
+    while True:
+        changed = watcher.wait()
+
+        while True:
+            more = watcher.wait(debounce)
+            if len(more) == 0:
+                break
+            changed |= more
+
+        changed = set(os.path.abspath(path) for path in changed
+                      if os.path.splitext(path)[1].lower() in EXTENSIONS or os.path.isdir(path))
+        if len(changed) > 0:
+            return changed
+
+#___________________________________________________________________________________________________
+def reloadModules(changed):
+    """
+        Reloads the changed lib modules imported by this process, so that worker processes
+        started from it use the new source.
+    """
+
+    for path in changed:
+        if os.path.dirname(path) != rebuild.LIB_DIR or not path.endswith(".py"):
+            continue
+
+        module = sys.modules.get("lib." + os.path.basename(path)[:-3])
+        if module is not None and module.__name__ != __name__:
+            importlib.reload(module)
+
+#___________________________________________________________________________________________________
+def getAffectedJobs(jobs, changed):
+    """
+        Returns the jobs with an input among the changed paths. A changed folder (event
+        queue overflow) affects all jobs.
+    """
+
+    if any(os.path.isdir(path) for path in changed):
+        return list(jobs)
+
+    lib_modules = set(os.path.basename(path) for path in changed if os.path.dirname(path) == rebuild.LIB_DIR)
+
+    if len(lib_modules & set(rebuild.ENGINE_MODULES)) > 0:
+        return list(jobs)
+
+    affected = []
+
+    for job in jobs:
+        # the acronym file may be new, job["acronyms"] is "" while it does not exist
+        acronym_file = registry.DOCUMENTS.get(job["key"], (None, ""))[1]
+        inputs = (job["pdf"], job["acronyms"], os.path.join(os.path.dirname(job["pdf"]), acronym_file))
+
+        if job["extractor"] + ".py" in lib_modules or any(os.path.abspath(path) in changed for path in inputs if path):
+            affected.append(job)
+
+    return affected
+
+#___________________________________________________________________________________________________
+def rebuildJobs(jobs, manifest, options, processes=None, timeout=None):
+    """
+        Extracts the stale jobs and records them in the build manifest.
+        Returns the results of the extracted jobs.
+    """
+
+    for job in jobs:
+        job["options"] = options
+
+    stale, _ = rebuild.selectStale(manifest, jobs)
+    results = batch.runBatch(stale, processes, timeout, report=batch.printResult)
+
+    for result in results:
+        if result["status"] == "ok":
+            rebuild.recordBuild(manifest, result)
+    rebuild.saveManifest(manifest)
+
+    return results
+
+#___________________________________________________________________________________________________
+def main(argv):
+    """
+        Command line of the watch mode, see main.py.
+    """
+
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="main.py watch", description="Extract documents again when their inputs change.")
+    parser.add_argument("documents", nargs="*", help="document keys (default: all)")
+    parser.add_argument("--input-dir", default="input", help="folder with the PDFs and acronym files (default: input)")
+    parser.add_argument("--output-dir", default=None, help="folder of the output files (default: output next to the input folder)")
+    parser.add_argument("--jobs", type=int, default=None, help="documents extracted in parallel (default: CPU count)")
+    parser.add_argument("--timeout", type=float, default=None, help="seconds after which a single document is aborted")
+    parser.add_argument("--debounce", type=float, default=0.5, help="quiet seconds that end a burst of changes (default: 0.5)")
+    parser.add_argument("--poll", action="store_true", help="compare the files periodically instead of using inotify")
+    parser.add_argument("--interval", type=float, default=1.0, help="seconds between two polls (default: 1)")
+    args = parser.parse_args(argv)
+
+    if args.jobs is not None and args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+
+    try:
+        batch.findDocuments(args.input_dir, args.documents)
+    except ValueError as e:
+        parser.error(str(e))
+
+    options = {"stream": False, "output_dir": args.output_dir, "compression": None}
+    manifest = rebuild.loadManifest()
+    watcher = openWatcher([args.input_dir, rebuild.LIB_DIR], args.poll, args.interval)
+
+    print("Watching " + args.input_dir + " and " + rebuild.LIB_DIR + " (" + type(watcher).__name__ + "), Ctrl+C to stop.")
+
+    try:
+        rebuildJobs(batch.findDocuments(args.input_dir, args.documents), manifest, options, args.jobs, args.timeout)
+
+        while True:
+            changed = waitForChanges(watcher, args.debounce)
+            print(time.strftime("%H:%M:%S") + " " + str(len(changed)) + " changed: "
+                  + ", ".join(sorted(os.path.basename(path) for path in changed)))
+
+            try:
+                reloadModules(changed)
+                jobs = batch.findDocuments(args.input_dir, args.documents)
+            except Exception as e:
+                print("    " + type(e).__name__ + ": " + str(e))
+                continue
+
+            results = rebuildJobs(getAffectedJobs(jobs, changed), manifest, options, args.jobs, args.timeout)
+            if len(results) == 0:
+                print("    no document changed")
+
+    except KeyboardInterrupt:
+        print("Stopped.")
+
+    finally:
+        watcher.close()
+
+    return 0
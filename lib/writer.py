@@ -0,0 +1,92 @@
+"""
+    Writer of the output files of the extraction.
+
+    The output file of a document is named after its PDF (document key + ".txt") and written to
+    an output folder, by default the folder "output" next to the input folder of the PDF
+    (input/SAVOIR-GS-001.pdf -> output/SAVOIR-GS-001.txt).
+
+    Output files are written atomically: the content goes to a temporary file in the output
+    folder (unique per process) that replaces the output file when it is complete. Readers and
+    other batch workers never see a partially written file, and an interrupted extraction
+    leaves the previous output in place.
+
+    COMPRESSION:
+    None        plain text (.txt)
+    "gzip"      gzip (.txt.gz)
+    "lzma"      xz (.txt.xz)
+
+"""
+
+import contextlib
+import gzip
+import lzma
+import os
+
+COMPRESSIONS = {
+    None: "",
+    "gzip": ".gz",
+    "lzma": ".xz",
+}
+
+#___________________________________________________________________________________________________
+def getOutputDir(path_to_doc):
+    """
+        Returns the default output folder of a document: "output" next to the folder of the PDF.
+    """
+
+    return os.path.join(os.path.dirname(os.path.dirname(path_to_doc)), "output")
+
+#___________________________________________________________________________________________________
+def getOutputPath(path_to_doc, output_dir=None, compression=None):
+    """
+        Returns the path of the output file of a document.
+    """
+
+    if compression not in COMPRESSIONS:
+        raise ValueError("Unknown compression " + repr(compression) + ", choose gzip or lzma")
+
+    if output_dir is None:
+        output_dir = getOutputDir(path_to_doc)
+
+    key = os.path.splitext(os.path.basename(path_to_doc))[0]
+
+    return os.path.join(output_dir, key + ".txt" + COMPRESSIONS[compression])
+
+#___________________________________________________________________________________________________
+@contextlib.contextmanager
+def openOutput(output_path, compression=None):
+    """
+        Opens a text file that replaces output_path atomically when the with block ends.
+        If the block fails, the temporary file is removed and output_path stays unchanged.
+    """
+
+    directory = os.path.dirname(output_path)
+    if directory != "":
+        os.makedirs(directory, exist_ok=True)
+
+    temp_path = output_path + "." + str(os.getpid()) + ".tmp"
+
+    if compression == "gzip":
+        f = gzip.open(temp_path, "wt", encoding="utf-8", newline="")
+    elif compression == "lzma":
+        f = lzma.open(temp_path, "wt", encoding="utf-8", newline="")
+    else:
+        f = open(temp_path, "w", encoding="utf-8", newline="", buffering=1 << 20)
+
+    try:
+        with f:
+            yield f
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+    os.replace(temp_path, output_path)
+
+#___________________________________________________________________________________________________
+def writeOutput(output_path, text, compression=None):
+    """
+        Writes the complete text of an output file atomically in one pass.
+    """
+
+    with openOutput(output_path, compression) as f:
+        f.write(text)
@@ -1,30 +1,114 @@
-from lib import ex_MPY_SPB_SRS
-from lib import ex_E_CS_SRS
-from lib import ex_E_GTD_SRS
-from lib import ex_E_GTD_TR
-from lib import ex_RTEMS_SRS
-from lib import ex_RTEMS_ICD
-from lib import ex_SAVOIR_GS
-from lib import ex_SAVOIR_GS_DSSnIRD
-from lib import ex_SAVOIR_GS_EPFS
-from lib import ex_SAVOIR_GS_FCIS
-from lib import ex_SAVOIR_GS_OBCSRD
-from lib import ex_SAVOIR_GS_RTUFuOR
+"""
+    Extract the requirements statements of the corpus in the input folder.
+
+    USAGE:
+    python3 main.py                                  all registered documents in input/
+    python3 main.py SAVOIR-GS-001 RTEMS_ICD          selected documents (PDF name without .pdf)
+    python3 main.py --manifest corpus.json           documents listed in a manifest
+    python3 main.py --incremental                    only documents whose inputs changed since the last run
+    python3 main.py --progress                       pages, throughput and ETA of the running documents
+    python3 main.py --output-dir out --compress gzip write gzip compressed output files to out/
+    python3 main.py bench run                        benchmark of the extraction stages
+    python3 main.py bench compare old.json new.json  regressions between two benchmark results
+    python3 main.py --metrics run.jsonl              write stage timings and counters as JSON lines
+    python3 main.py metrics run.jsonl                slowest documents and stages of a metrics file
+    python3 main.py verify --golden DIR              compare all engine variants with golden outputs
+    python3 main.py backends bench                   throughput and output equivalence of the text backends
+    python3 main.py corpus build                     all requirements in one memory-mapped corpus file
+    python3 main.py lookup SAVOIR.MMS.GEN.0100       find requirements by ID in the corpus
+    python3 main.py dedup --threshold 0.8            clusters of near-duplicate requirements in the corpus
+    python3 main.py diff OLD.pdf NEW.pdf             added, removed, modified and moved requirements of two issues
+    python3 main.py rules MPY-SPB-SRS-001            dead and fusible requirement operations of the profiles
+    python3 main.py watch                            extract documents again as soon as their inputs change
+    python3 main.py serve                            resident extraction service with warm workers
+
+"""
+
+import argparse
+import importlib
+import os
+import sys
+
+COMMANDS = {
+    "bench": "benchmark",
+    "metrics": "metrics",
+    "verify": "verify",
+    "backends": "backends",
+    "corpus": "corpus",
+    "lookup": "id_index",
+    "dedup": "dedup",
+    "diff": "revision",
+    "rules": "rules",
+    "watch": "watch",
+    "serve": "service",
+}
 
 def main ():
 
-    #ex_MPY_SPB_SRS.extract("input/MPY-SPB-SRS-001.pdf", "input/MPY-SPB-SRS-001 Acronyms.txt")
-    #ex_E_CS_SRS.extract("input/E1356-CS-SRS-01_I1_R3.pdf", "input/E1356-CS-SRS-01_I1_R3 Acronyms.txt")
-    #ex_E_GTD_SRS.extract("input/E1356-GTD-SRS-01_I1_R4.pdf", "input/E1356-GTD-SRS-01_I1_R4 Acronyms.txt")
-    #ex_E_GTD_TR.extract("input/E1356-GTD-TR-01_I2_R1.pdf", "input/E1356-GTD-TR-01-I2-R1 Acronyms.txt")
-    #ex_RTEMS_SRS.extract("input/RTEMS_SRS.pdf", "input/RTEMS_SRS Acronyms.txt")
-    #ex_RTEMS_ICD.extract("input/RTEMS_ICD.pdf", "input/RTEMS_ICD Acronyms.txt")
-    
-    #ex_SAVOIR_GS.extract("input/SAVOIR-GS-001.pdf", "input/SAVOIR-GS-001 Acronyms.txt")
-    #ex_SAVOIR_GS_DSSnIRD.extract("input/SAVOIR-GS-DSSnIRD-006.pdf", "input/SAVOIR-GS-DSSnIRD-006 Acronyms.txt")
-    #ex_SAVOIR_GS_EPFS.extract("input/SAVOIR-GS-EPFS-005.pdf", "input/SAVOIR-GS-EPFS-005 Acronyms.txt")
-    #ex_SAVOIR_GS_FCIS.extract("input/SAVOIR-GS-FCIS-002.pdf", "input/SAVOIR-GS-FCIS-002 Acronyms.txt")
-    #ex_SAVOIR_GS_OBCSRD.extract("input/SAVOIR-GS-OBCSRD-008.pdf", "input/SAVOIR-GS-OBCSRD-008 Acronyms.txt")
-    #ex_SAVOIR_GS_RTUFuOR.extract("input/SAVOIR-GS-RTUFuOR-003.pdf", "input/SAVOIR-GS-RTUFuOR-003 Acronyms.txt")
-
-main()
+    if len(sys.argv) > 1 and sys.argv[1] in COMMANDS:
+        module = importlib.import_module("lib." + COMMANDS[sys.argv[1]])
+        return module.main(sys.argv[2:])
+
+    # imported after the dispatch, the commands import only the modules they need
+    from lib import batch, metrics, progress, rebuild
+
+    parser = argparse.ArgumentParser(description="Extract requirements statements from space project documents.")
+    parser.add_argument("documents", nargs="*", help="document keys, i.e. PDF file names without extension (default: all)")
+    parser.add_argument("--input-dir", default="input", help="folder with the PDFs and acronym files (default: input)")
+    parser.add_argument("--manifest", help="JSON manifest listing the documents to extract")
+    parser.add_argument("--jobs", type=int, default=None, help="documents extracted in parallel (default: CPU count)")
+    parser.add_argument("--timeout", type=float, default=None, help="seconds after which a single document is aborted")
+    parser.add_argument("--metrics", help="append stage timings and counters as JSON lines to this file")
+    parser.add_argument("--incremental", action="store_true", help="skip documents whose PDF, acronyms and extractor are unchanged")
+    parser.add_argument("--stream", action="store_true", help="process every document page by page with bounded memory")
+    parser.add_argument("--output-dir", default=None, help="folder of the output files (default: output next to the input folder)")
+    parser.add_argument("--compress", choices=("gzip", "lzma"), default=None, help="write compressed output files (.txt.gz, .txt.xz)")
+    parser.add_argument("--progress", action="store_true", help="show the progress of the running documents on stderr")
+    args = parser.parse_args()
+
+    if args.jobs is not None and args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+
+    try:
+        if args.manifest:
+            jobs = batch.loadManifest(args.manifest)
+        else:
+            jobs = batch.findDocuments(args.input_dir, args.documents)
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.metrics:
+        metrics.configure(path=os.path.abspath(args.metrics))
+
+    for job in jobs:
+        job["options"] = {"stream": args.stream, "output_dir": args.output_dir, "compression": args.compress}
+
+    if args.incremental:
+        build_manifest = rebuild.loadManifest()
+        jobs, fresh = rebuild.selectStale(build_manifest, jobs)
+        for job in fresh:
+            print("[unchanged] " + job["key"])
+
+    display = progress.Display(len(jobs)) if args.progress else None
+
+    def report(result):
+        if display is not None:
+            display.clear()
+        batch.printResult(result)
+
+    results = batch.runBatch(jobs, args.jobs, args.timeout, report=report, report_progress=display)
+    if display is not None:
+        display.clear()
+    failed = [r for r in results if r["status"] != "ok"]
+
+    if args.incremental:
+        for result in results:
+            if result["status"] == "ok":
+                rebuild.recordBuild(build_manifest, result)
+        rebuild.saveManifest(build_manifest)
+
+    print(str(len(results) - len(failed)) + " of " + str(len(results)) + " documents extracted.")
+    return 1 if len(failed) > 0 else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
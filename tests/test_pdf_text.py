@@ -0,0 +1,98 @@
+"""
+    Tests of the chapter selection by the bookmarks of a PDF (pdf_text.getChapterPages).
+    The PDFs are written with PyPDF2: blank pages and a nested outline.
+"""
+
+import os
+import tempfile
+import unittest
+
+from PyPDF2 import PdfWriter
+
+from lib import pdf_text
+
+#___________________________________________________________________________________________________
+def writePDF(path, page_count, outline=()):
+    """
+        Writes a PDF of blank pages. outline: (title, page index, parent title or None),
+        parents first.
+    """
+
+    writer = PdfWriter()
+    for _ in range(0, page_count):
+        writer.add_blank_page(width=595, height=842)
+
+    items = {}
+    for title, page, parent in outline:
+        items[title] = writer.add_outline_item(title, page, parent=items.get(parent))
+
+    with open(path, "wb") as f:
+        writer.write(f)
+
+#___________________________________________________________________________________________________
+class ChapterPagesTest(unittest.TestCase):
+
+    def setUp(self):
+
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "bookmarks.pdf")
+
+        writePDF(self.path, 8, [
+            ("1 Introduction", 0, None),
+            ("2 Requirements", 1, None),
+            ("2.1 General", 2, "2 Requirements"),
+            ("2.1.1 Interfaces", 3, "2.1 General"),
+            ("2.2 Performance", 4, "2 Requirements"),
+            ("3 Verification", 5, None),
+            ("4 Annex Requirements", 6, None),
+        ])
+
+    def tearDown(self):
+
+        self.directory.cleanup()
+
+    def testOutlineLevels(self):
+
+        outline, page_count = pdf_text.getOutline(self.path)
+
+        self.assertEqual(page_count, 8)
+        self.assertEqual(outline, [
+            (0, "1 Introduction", 0),
+            (0, "2 Requirements", 1),
+            (1, "2.1 General", 2),
+            (2, "2.1.1 Interfaces", 3),
+            (1, "2.2 Performance", 4),
+            (0, "3 Verification", 5),
+            (0, "4 Annex Requirements", 6),
+        ])
+
+    def testChapterEndsOnPageOfNextChapter(self):
+
+        # the nested entries do not end the chapter
+        self.assertEqual(pdf_text.getChapterPages(self.path, r"2 "), [1, 2, 3, 4, 5])
+
+    def testLastChapterEndsWithDocument(self):
+
+        self.assertEqual(pdf_text.getChapterPages(self.path, r"4 "), [6, 7])
+
+    def testSeveralChapters(self):
+
+        self.assertEqual(pdf_text.getChapterPages(self.path, r"[0-9]+ .*Requirements"), [1, 2, 3, 4, 5, 6, 7])
+
+    def testNestedTitlesAreNoChapters(self):
+
+        self.assertIsNone(pdf_text.getChapterPages(self.path, r"2\.1"))
+
+    def testNoMatch(self):
+
+        self.assertIsNone(pdf_text.getChapterPages(self.path, r"5 "))
+
+    def testNoBookmarks(self):
+
+        path = os.path.join(self.directory.name, "plain.pdf")
+        writePDF(path, 3)
+
+        self.assertIsNone(pdf_text.getChapterPages(path, r".*"))
+
+if __name__ == "__main__":
+    unittest.main()